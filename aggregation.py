@@ -0,0 +1,375 @@
+"""
+Season aggregation over the scraped match reports.
+
+Reads every "{Team} - Match Reports/Match N {Team} - {Opponent}.xlsx" workbook of a season folder into
+one long DataFrame per table type (Summary, Pass, GK, ...) and computes team and player totals, per-90
+rates, rolling windows and home/away splits with vectorized group-bys. The match-level data is cached in
+the season folder and only new or changed workbooks are read again. Team totals can be cross-checked
+against the scraped Season-Stats tables.
+
+Usage:
+    aggregator = SeasonAggregator("Premier League-Men/2023-2024")
+    totals = aggregator.team_totals(split="venue", last=5)
+    print(per_90(aggregator.player_totals(min_minutes=900)))
+    print(aggregator.cross_check())
+"""
+import os
+import re
+
+import pandas as pd
+
+from utils import load_cache, save_cache
+
+# Sheet name suffixes written by save_report, mapped to the table they contain
+TABLE_TYPES = ["Summary", "Pass", "PassType", "Def Act", "Poss", "Other", "GK", "Shots"]
+# Tables with one row per player and match. The shot tables have one row per shot (Minute, Distance, ...),
+# so their columns can't be summed into team or player totals
+SUMMABLE_TABLE_TYPES = [table_type for table_type in TABLE_TYPES if table_type != "Shots"]
+ID_COLUMNS = ["Player", "#", "Nation", "Pos", "Age"]  # Text columns of the player stats tables
+KEY_COLUMNS = ["team", "opponent", "match_number", "side"]
+# Match context from the fixtures: team-level results, which can't be summed over players.
+# Named apart from the stat columns (the GK tables have their own GA), so merging never suffixes them.
+FIXTURE_COLUMNS = ["team_GF", "team_GA", "team_Pts"]
+# Season-Stats columns compared by cross_check, with the match report column they are computed from
+CROSS_CHECK_STATS = ["MP", "Min", "Gls", "Ast", "PK", "PKatt", "CrdY", "CrdR"]
+
+CACHE_FILE = "Match-Stats-cache.pkl"
+MANIFEST_FILE = "Match-Stats-cache.json"
+REPORTS_SUFFIX = " - Match Reports"
+
+
+def summable_columns(df, fixture_columns=True):
+    """
+    Numeric stat columns that can be summed (percentages and averages can't).
+    fixture_columns=False leaves out the match results (FIXTURE_COLUMNS), which only add up per team, not per player.
+    """
+    return [col for col in df.select_dtypes("number").columns
+            if col not in KEY_COLUMNS and col not in ID_COLUMNS and "%" not in col and not col.startswith("Avg")
+            and (fixture_columns or col not in FIXTURE_COLUMNS)]
+
+
+def to_numeric_columns(df):
+    """
+    Convert the stat columns scraped as text ("1,234", "0") to numbers, leaving the text columns alone.
+    A column is only converted if all its values are numbers: empty cells are scraped as "0", so a text
+    column (e.g. Notes) can hold numbers too, and its text must not be replaced with NaN.
+    """
+    for col in df.columns:
+        if col in ID_COLUMNS or col in KEY_COLUMNS or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        values = df[col].dropna()
+        converted = pd.to_numeric(values.astype(str).str.replace(",", "", regex=False), errors="coerce")
+        if not values.empty and converted.notna().all():
+            df[col] = converted.reindex(df.index)
+    return df
+
+
+def per_90(totals):
+    """
+    Per-90 rates of a totals table (from team_totals or player_totals).
+    Uses the "90s" column: minutes / 90 for players, matches played for teams.
+    """
+    rates = totals.copy()
+    stats = [col for col in summable_columns(totals) if col not in ("Min", "MP", "90s")]
+    rates[stats] = totals[stats].div(totals["90s"].where(totals["90s"] > 0), axis=0)
+    return rates
+
+
+def read_match_report(path, team, opponent, match_number):
+    """
+    Read all the sheets of a match report workbook into {table type: DataFrame}, with the players of
+    team on the "for" side and the players of the opponent on the "against" side.
+    """
+    team_with_space = team.replace("-", " ")
+    tables = {}
+    for sheet_name, df in pd.read_excel(path, sheet_name=None, engine="openpyxl").items():
+        for table_type in TABLE_TYPES:
+            if sheet_name.endswith(f" {table_type}"):
+                break
+        else:
+            continue  # e.g. "Both Squads"
+        sheet_team = sheet_name[:-len(table_type) - 1]
+        df = to_numeric_columns(df.dropna(how="all"))
+        df.insert(0, "side", "for" if sheet_team == team_with_space else "against")
+        df.insert(0, "match_number", match_number)
+        df.insert(0, "opponent", opponent)
+        df.insert(0, "team", team)
+        tables.setdefault(table_type, []).append(df)
+    return {table_type: pd.concat(dfs, ignore_index=True) for table_type, dfs in tables.items()}
+
+
+def load_fixtures(season_folder):
+    """
+    Match context from Fixtures.xlsx, one row per team and match: venue, date, goals for and against and points
+    (team_GF, team_GA, team_Pts).
+    Match N of a team is its N-th fixture, the same order used to save the match reports.
+    """
+    fixtures_file = os.path.join(season_folder, "Fixtures.xlsx")
+    if not os.path.exists(fixtures_file):
+        print(f"File {fixtures_file} does not exist. Venue splits and results are not available.")
+        return pd.DataFrame(columns=["team", "match_number", "venue", "Date"] + FIXTURE_COLUMNS)
+    fixtures = pd.read_excel(fixtures_file, engine="openpyxl").dropna(subset=["Home", "Away"])
+    fixtures["order"] = range(len(fixtures))
+    goals = fixtures["Score"].astype(str).str.extract(r"(\d+)\D+(\d+)").astype(float)
+    home = pd.DataFrame({"team": fixtures["Home"], "venue": "Home", "team_GF": goals[0], "team_GA": goals[1]})
+    away = pd.DataFrame({"team": fixtures["Away"], "venue": "Away", "team_GF": goals[1], "team_GA": goals[0]})
+    long = pd.concat([home, away])
+    long["Date"] = pd.to_datetime(fixtures["Date"], errors="coerce").reindex(long.index).values
+    long["order"] = fixtures["order"].reindex(long.index).values
+    long = long.sort_values(["order", "venue"], ascending=[True, False])
+    long["match_number"] = long.groupby("team").cumcount() + 1
+    long["team_Pts"] = match_points(long["team_GF"], long["team_GA"])
+    return long.drop(columns="order").reset_index(drop=True)
+
+
+def match_points(goals_for, goals_against):
+    return (3 * (goals_for > goals_against) + (goals_for == goals_against)).where(goals_for.notna())
+
+
+def fixtures_for_side(fixtures, side):
+    """
+    Match context seen from the given side: for the "against" side (the opponents' players) goals for and
+    against are swapped and team_Pts are the points the opponent took. Venue and date stay those of the team.
+    """
+    if side != "against":
+        return fixtures
+    flipped = fixtures.rename(columns={"team_GF": "team_GA", "team_GA": "team_GF"})
+    flipped["team_Pts"] = match_points(flipped["team_GF"], flipped["team_GA"])
+    return flipped
+
+
+class SeasonAggregator:
+    """Team and player aggregates of one season folder, computed from the scraped match reports."""
+
+    def __init__(self, season_folder, use_cache=True):
+        self.season_folder = season_folder
+        self.use_cache = use_cache
+        self.tables = {}
+        self.manifest = {}
+        self.fixtures = None
+        self.fixtures_mtime = None
+        if use_cache:
+            self._load_cache()
+        self.refresh()
+
+    # Cache
+    def _cache_paths(self):
+        return os.path.join(self.season_folder, CACHE_FILE), os.path.join(self.season_folder, MANIFEST_FILE)
+
+    def _load_cache(self):
+        cache_file, manifest_file = self._cache_paths()
+        if os.path.exists(cache_file) and os.path.exists(manifest_file):
+            cache = pd.read_pickle(cache_file)
+            self.tables = cache["tables"]
+            self.fixtures, self.fixtures_mtime = cache["fixtures"], cache["fixtures_mtime"]
+            self.manifest = load_cache(manifest_file)
+
+    def _save_cache(self):
+        cache_file, manifest_file = self._cache_paths()
+        pd.to_pickle({"tables": self.tables, "fixtures": self.fixtures, "fixtures_mtime": self.fixtures_mtime},
+                     cache_file)
+        save_cache(self.manifest, manifest_file)
+
+    def match_report_files(self):
+        """{relative path: (team, opponent, match number, modification time)} for every match report of the season."""
+        files = {}
+        for folder in sorted(os.listdir(self.season_folder)):
+            if not folder.endswith(REPORTS_SUFFIX):
+                continue
+            team = folder[:-len(REPORTS_SUFFIX)]
+            pattern = re.compile(rf"^Match (\d+) {re.escape(team)} - (.+)\.xlsx$")
+            for file in os.listdir(os.path.join(self.season_folder, folder)):
+                match = pattern.match(file)
+                if match:
+                    path = os.path.join(folder, file)
+                    mtime = os.path.getmtime(os.path.join(self.season_folder, path))
+                    files[path] = (team, match.group(2), int(match.group(1)), mtime)
+        return files
+
+    def _refresh_fixtures(self):
+        """Read Fixtures.xlsx again if it changed since the last refresh. Returns True if it was read."""
+        fixtures_file = os.path.join(self.season_folder, "Fixtures.xlsx")
+        mtime = os.path.getmtime(fixtures_file) if os.path.exists(fixtures_file) else None
+        if self.fixtures is not None and mtime == self.fixtures_mtime:
+            return False
+        self.fixtures = load_fixtures(self.season_folder)
+        self.fixtures_mtime = mtime
+        return True
+
+    def refresh(self):
+        """
+        Read the match reports added or changed since the last refresh, and the fixtures if they changed.
+        Returns the number of workbooks read.
+        """
+        fixtures_changed = self._refresh_fixtures()
+        files = self.match_report_files()
+        changed = [path for path, info in files.items() if self.manifest.get(path) != info[3]]
+        removed = [path for path in self.manifest if path not in files]
+        if not changed and not removed:
+            if fixtures_changed and self.use_cache:
+                self._save_cache()
+            return 0
+
+        stale = set(changed) | set(removed)
+        new_tables = {}
+        for path in changed:
+            team, opponent, match_number, mtime = files[path]
+            for table_type, df in read_match_report(os.path.join(self.season_folder, path), team, opponent,
+                                                    match_number).items():
+                df.insert(0, "file", path)
+                new_tables.setdefault(table_type, []).append(df)
+            self.manifest[path] = mtime
+        for path in removed:
+            del self.manifest[path]
+
+        for table_type in set(self.tables) | set(new_tables):
+            parts = []
+            if table_type in self.tables:
+                current = self.tables[table_type]
+                parts.append(current[~current["file"].isin(stale)])
+            parts.extend(new_tables.get(table_type, []))
+            self.tables[table_type] = pd.concat(parts, ignore_index=True)
+
+        print(f"Loaded {len(changed)} match reports ({len(files)} in {self.season_folder}).")
+        if self.use_cache:
+            self._save_cache()
+        return len(changed)
+
+    # Match-level data
+    def _table(self, table, summable=False):
+        if summable and table not in SUMMABLE_TABLE_TYPES:
+            raise ValueError(f"{table} tables have one row per shot and can't be summed. Use player_stats instead.")
+        if table not in self.tables:
+            raise ValueError(f"No {table} tables found in {self.season_folder}.")
+        return self.tables[table]
+
+    def player_stats(self, table="Summary", side="for"):
+        """
+        One row per player and match, with the match context (venue, date, result) from the fixtures.
+        The result (team_GF, team_GA, team_Pts) is the one of the player's own team (see fixtures_for_side).
+        """
+        df = self._table(table)
+        if side is not None:
+            df = df[df["side"] == side]
+        fixtures = pd.concat([fixtures_for_side(self.fixtures, fixture_side).assign(side=fixture_side)
+                              for fixture_side in ("for", "against")], ignore_index=True)
+        # No suffixes: a fixture column clashing with a stat column must fail, not silently become GA_x/GA_y
+        return df.merge(fixtures, on=["team", "match_number", "side"], how="left", suffixes=(False, False))
+
+    def team_match_stats(self, table="Summary", side="for"):
+        """One row per team and match: the sum of the players' stats, with venue, date and result of the side."""
+        df = self._table(table, summable=True)
+        df = df[df["side"] == side]
+        stats = summable_columns(df)
+        aggregations = {col: "sum" for col in stats}
+        if "Min" in aggregations:
+            aggregations["Min"] = "max"  # Team minutes are the match minutes, as in the FBref squad tables
+        team_matches = df.groupby(["team", "opponent", "match_number"], as_index=False).agg(aggregations)
+        team_matches = team_matches.merge(fixtures_for_side(self.fixtures, side), on=["team", "match_number"],
+                                          how="left", suffixes=(False, False))
+        return team_matches.sort_values(["team", "match_number"], ignore_index=True)
+
+    # Aggregates
+    @staticmethod
+    def _select_matches(df, matches=None, last=None):
+        """Keep the matches numbered matches=(first, last), and/or the last N matches of each team."""
+        if matches is not None:
+            df = df[df["match_number"].between(*matches)]
+        if last is not None:
+            latest = df.drop_duplicates(["team", "match_number"]).sort_values("match_number")
+            latest = latest[latest.groupby("team").cumcount(ascending=False) < last]
+            df = df.merge(latest[["team", "match_number"]], on=["team", "match_number"])
+        return df
+
+    def team_totals(self, table="Summary", side="for", split=None, matches=None, last=None):
+        """
+        Team totals over a window of matches. side="against" sums the opponents' stats.
+        split="venue" gives home/away splits. matches and last select the window (see _select_matches).
+        """
+        df = self._select_matches(self.team_match_stats(table, side), matches, last)
+        keys = ["team"] + ([split] if split else [])
+        stats = summable_columns(df)
+        totals = df.groupby(keys)[stats].sum()
+        totals.insert(0, "MP", df.groupby(keys)["match_number"].nunique())
+        totals.insert(1, "90s", totals["MP"])
+        return totals
+
+    def player_totals(self, table="Summary", split=None, matches=None, last=None, min_minutes=0):
+        """Player totals over a window of matches, for players with at least min_minutes."""
+        self._table(table, summable=True)
+        df = self._select_matches(self.player_stats(table), matches, last)
+        keys = ["team", "Player"] + ([split] if split else [])
+        stats = summable_columns(df, fixture_columns=False)  # Team results would be counted once per player
+        totals = df.groupby(keys)[stats].sum()
+        totals.insert(0, "MP", df.groupby(keys)["match_number"].nunique())
+        if "Min" in totals:
+            totals.insert(1, "90s", totals["Min"] / 90)
+            totals = totals[totals["Min"] >= min_minutes]
+        return totals
+
+    def rolling(self, window, table="Summary", side="for", stats=None):
+        """Rolling sums over the last `window` matches of each team (form), one row per team and match."""
+        df = self.team_match_stats(table, side)
+        stats = stats or summable_columns(df)
+        rolled = (df.groupby("team")[stats]
+                  .rolling(window, min_periods=1).sum()
+                  .reset_index(level=0, drop=True))
+        return df[["team", "opponent", "match_number", "venue", "Date"]].join(rolled)
+
+    # Validation
+    def cross_check(self, tolerance=0.5):
+        """
+        Compare the team totals computed from the match reports with the scraped "Squad Standard Stats"
+        in Season-Stats.xlsx (for) and Season-Stats-against.xlsx (against). Returns the mismatches, including
+        the teams found on one side only (e.g. a missing match report folder or a renamed squad).
+        """
+        columns = ["team", "side", "stat", "difference", "computed", "scraped", "issue"]
+        mismatches = []
+        for side, file in (("for", "Season-Stats.xlsx"), ("against", "Season-Stats-against.xlsx")):
+            path = os.path.join(self.season_folder, file)
+            if not os.path.exists(path):
+                print(f"File {path} does not exist. Skipping the {side} cross-check.")
+                continue
+            sheets = pd.read_excel(path, sheet_name=None, engine="openpyxl")
+            standard = next((df for name, df in sheets.items() if name.startswith("Squad Standard Stats")), None)
+            if standard is None:
+                print(f"No Squad Standard Stats table in {path}.")
+                continue
+            standard = to_numeric_columns(standard.dropna(subset=["Squad"]))
+            standard["team"] = standard["Squad"].astype(str).str.replace(r"^vs ", "", regex=True)
+            scraped = standard.set_index("team")
+            computed = self.team_totals(side=side)
+
+            # Teams on one side only can't be compared: report them with their matches played
+            for teams, issue in ((scraped.index.difference(computed.index), "missing from match reports"),
+                                 (computed.index.difference(scraped.index), "missing from season stats")):
+                if teams.empty:
+                    continue
+                mismatches.append(pd.DataFrame({
+                    "team": teams, "side": side, "stat": "MP", "difference": float("nan"),
+                    "computed": computed["MP"].reindex(teams).values,
+                    "scraped": scraped["MP"].reindex(teams).values if "MP" in scraped else float("nan"),
+                    "issue": issue,
+                }))
+
+            stats = [stat for stat in CROSS_CHECK_STATS if stat in scraped and stat in computed]
+            teams = computed.index.intersection(scraped.index)
+            diff = computed.loc[teams, stats] - scraped.loc[teams, stats]
+            long = diff.stack().rename("difference").reset_index()
+            long.columns = ["team", "stat", "difference"]
+            long = long[long["difference"].abs() > tolerance]
+            if long.empty:
+                continue
+            long.insert(1, "side", side)
+            long["computed"] = [computed.at[t, s] for t, s in zip(long["team"], long["stat"])]
+            long["scraped"] = [scraped.at[t, s] for t, s in zip(long["team"], long["stat"])]
+            long["issue"] = "mismatch"
+            mismatches.append(long)
+        if not mismatches:
+            print("Match report totals match the scraped season stats.")
+            return pd.DataFrame(columns=columns)
+        result = pd.concat(mismatches, ignore_index=True)[columns]
+        missing = result["issue"] != "mismatch"
+        print(f"Found {(~missing).sum()} mismatches between match report totals and the scraped season stats, "
+              f"and {missing.sum()} teams missing on one side.")
+        return result
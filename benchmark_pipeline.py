@@ -0,0 +1,151 @@
+"""
+End-to-end benchmark of the season scraping flow against the local mock FBref server.
+
+Runs the same steps as Scrape-Selected-League.ipynb (get_closest_league -> run_schema_canary -> scrape_page_tables ->
+extract_team_urls -> extract_match_report_urls -> scrape_and_save_reports) for one synthetic season and
+reports wall-clock time, requests issued and how much of the request budget was used.
+
+The FBref policy (10 requests per minute, 6 seconds between requests) is scaled by --time-scale, so a
+full season can be measured in seconds: with --time-scale 0.01 the pause is 0.06 s and the budget is
+1000 requests per minute. The mock server enforces the same scaled budget and answers 429 above it.
+
+--backend browser fetches the pages through BrowserPoolFetcher (headless Edge, see EDGE_DRIVER_PATH)
+instead of plain HTTP, so the browser pool is measured against the same server.
+
+Usage:
+    python benchmark_pipeline.py --teams 8 --time-scale 0.01 --throttle-rate 0.02 --truncate-rate 0.02
+    python benchmark_pipeline.py --teams 4 --backend browser --pool-size 2
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+import mock_fbref
+import schema_canary
+import utils
+
+FBREF_REQUESTS_PER_MINUTE = 10
+FBREF_SCRAPE_DELAY = 6
+
+
+def run_season(league, gender, season, root_dir):
+    """Scrape one season the way the notebook does, storing the output under root_dir. Returns the reports saved."""
+    folder_path = os.path.join(root_dir, "Competitions")
+    os.makedirs(folder_path, exist_ok=True)
+    leagues_cache = os.path.join(folder_path, "league_links.json")
+    closest_league, league_info = utils.get_closest_league(league, leagues_cache, gender)
+    if not closest_league:
+        raise RuntimeError(f"League {league} not found.")
+
+    full_gender = 'Men' if gender == 'M' else 'Women'
+    folder_path = os.path.join(root_dir, closest_league + '-' + full_gender)
+    os.makedirs(folder_path, exist_ok=True)
+    seasons_cache = os.path.join(folder_path, f'{closest_league}_seasons.json')
+    season_url = utils.get_season_url(season, seasons_cache, league_info['url'])
+    if not season_url[1]:
+        raise RuntimeError(f"Season {season} not found.")
+
+    competition_url = season_url[1]
+    # Validate the page layouts on one sample of each page type before spending the request budget
+    schema_canary.run_schema_canary(competition_url, drift_log=os.path.join(root_dir, "Competitions",
+                                                                            "schema_drift.json"))
+    utils.respect_fbref_scrape_policy()
+    folder_path = os.path.join(folder_path, season)
+    os.makedirs(folder_path, exist_ok=True)
+    utils.scrape_page_tables(competition_url, os.path.join(folder_path, "Season-Stats.xlsx"), "left")
+    utils.respect_fbref_scrape_policy()
+    utils.scrape_page_tables(competition_url, os.path.join(folder_path, "Season-Stats-against.xlsx"), "right")
+
+    output_file = os.path.join(folder_path, "Fixtures.xlsx")
+    fixtures_url = utils.get_scores_and_fixtures_url(competition_url)
+    utils.scrape_page_tables(fixtures_url, output_file, "left")
+    utils.respect_fbref_scrape_policy()
+
+    reports = 0
+    for entry in utils.extract_team_urls(competition_url):
+        match_report_urls = utils.extract_match_report_urls(entry['team'], entry['url'], closest_league)
+        df = pd.read_excel(output_file, engine='openpyxl')
+        df_cleaned = df.dropna(how='all')
+        urls = [url_entry['url'] for url_entry in match_report_urls]
+        utils.update_fixtures_with_match_report_urls(df_cleaned, entry['team'], urls, output_file)
+
+        team_folder_path = os.path.join(folder_path, f"{entry['team']} - Match Reports")
+        os.makedirs(team_folder_path, exist_ok=True)
+        for match_number, report_url in enumerate(match_report_urls, start=1):
+            report_file = os.path.join(team_folder_path,
+                                       f"Match {match_number} {report_url['team']} - {report_url['opponent']}.xlsx")
+            utils.respect_fbref_scrape_policy()
+            utils.scrape_and_save_reports(report_url['url'], report_file, match_number, report_url['team'],
+                                          report_url['opponent'])
+            if os.path.exists(report_file):
+                reports += 1
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the season scraping flow against a mock FBref server.")
+    mock_fbref.add_server_arguments(parser)
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="Scale of the FBref scrape policy (1 = real 6 s pause and 10 requests per minute)")
+    parser.add_argument("--backend", choices=["http", "browser"], default="http",
+                        help="Fetch backend: plain HTTP or the headless browser pool")
+    parser.add_argument("--pool-size", type=int, default=2, help="Number of browsers of the browser pool")
+    parser.add_argument("--output", default=None, help="Keep the scraped files in this folder")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper output")
+    args = parser.parse_args()
+
+    budget_per_minute = FBREF_REQUESTS_PER_MINUTE / args.time_scale
+    args.retry_after *= args.time_scale  # The 429 lockouts are part of the policy, so scale them as well
+    if args.rate_limit is None:
+        # Enforce the scaled FBref budget on the server side as well
+        args.rate_limit = FBREF_REQUESTS_PER_MINUTE
+        args.rate_window = 60 * args.time_scale
+    server = mock_fbref.server_from_args(args).start()
+    league = server.site.leagues[0]
+    season = league.seasons[0]
+
+    utils.FBREF_BASE_URL = server.base_url
+    utils.SCRAPE_POLICY_DELAY = FBREF_SCRAPE_DELAY * args.time_scale
+    if args.backend == "browser":
+        fetcher = utils.BrowserPoolFetcher(args.pool_size)
+    else:
+        fetcher = utils.HttpFetcher()
+    previous_backend = utils.set_fetch_backend(fetcher)
+    root_dir = args.output or tempfile.mkdtemp(prefix="fbref-benchmark-")
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(None if args.verbose else log):
+            reports = run_season(league.name, args.gender, season, root_dir)
+    finally:
+        elapsed = time.perf_counter() - start
+        utils.set_fetch_backend(previous_backend)
+        fetcher.close()
+        server.shutdown()
+        server.server_close()
+        if args.output is None:
+            shutil.rmtree(root_dir, ignore_errors=True)
+
+    matches = sum(1 for _ in league.matches(season))
+    requests_allowed = budget_per_minute * elapsed / 60
+    stats = server.stats
+    print(f"League: {league.name} {season} ({len(league.teams)} teams, {matches} matches)")
+    print(f"Match reports saved: {reports} of {2 * matches}")
+    print(f"Season wall-clock time: {elapsed:.2f} s with the {args.backend} backend "
+          f"(scrape policy scaled x{args.time_scale:g})")
+    print(f"Requests issued: {fetcher.requests_issued} "
+          f"(server: {stats['status_200']} ok, {stats['status_429']} throttled, "
+          f"{stats['rate_limited']} over the rate limit, {stats['truncated']} truncated, {stats['status_404']} not found)")
+    print(f"Budget: {budget_per_minute:g} requests/min, utilization {100 * fetcher.requests_issued / requests_allowed:.1f}%")
+    if args.output:
+        print(f"Output saved in {root_dir}")
+
+
+if __name__ == "__main__":
+    main()
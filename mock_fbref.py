@@ -0,0 +1,730 @@
+"""
+Local stand-in for FBref, used to run the whole scraping flow without hitting fbref.com.
+
+It serves synthetic leagues of any size with the same URL scheme and page layout used by the scraper:
+competitions index, league seasons, season stats, scores & fixtures, squad pages, team match logs and
+match reports (some tables are wrapped in HTML comments, as FBref does). Latency, 429 responses with
+Retry-After, server-side rate limiting and truncated responses can be injected to test resilience.
+
+Usage:
+    python mock_fbref.py --teams 12 --seasons 2 --port 8000
+    then point the scraper at it with FBREF_BASE_URL=http://127.0.0.1:8000
+"""
+import argparse
+import datetime
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOWN_PREFIXES = ["North", "East", "West", "South", "Ash", "Oak", "Stone", "River", "Lake", "Hill", "Green", "Red",
+                 "Black", "White", "Elm", "Fair", "Brook", "Kings", "Queens", "Mill"]
+TOWN_MIDDLES = ["", "en", "ing", "er", "ow", "al"]
+TOWN_SUFFIXES = ["field", "bridge", "ford", "vale", "mouth", "wick", "ham", "ton", "bury", "port", "stead", "worth"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Chris", "Robin", "Jamie", "Charlie", "Taylor", "Morgan", "Casey",
+               "Riley", "Drew", "Quinn", "Avery", "Rowan", "Sidney", "Kai", "Noa", "Luca", "Mika"]
+LAST_NAMES = ["Smith", "Jones", "Garcia", "Muller", "Rossi", "Silva", "Dubois", "Novak", "Jensen", "Kowalski",
+              "Hughes", "Moreno", "Berg", "Costa", "Ivanov", "Okafor", "Tanaka", "Larsen", "Bianchi", "Walsh"]
+NATIONS = ["eng ENG", "es ESP", "fr FRA", "de GER", "it ITA", "nl NED", "br BRA", "us USA"]
+POSITIONS = ["DF", "DF", "DF", "DF", "MF", "MF", "MF", "FW", "FW", "FW", "MF", "DF", "FW", "MF", "DF", "MF", "FW"]
+
+# Player stats tables of a match report: (table suffix, columns as (header, data-stat))
+PLAYER_COLUMNS = [("Player", "player"), ("#", "shirtnumber"), ("Nation", "nationality"), ("Pos", "position"),
+                  ("Age", "age"), ("Min", "minutes")]
+MATCH_PLAYER_TABLES = [
+    ("summary", PLAYER_COLUMNS + [
+        ("Gls", "goals"), ("Ast", "assists"), ("PK", "pens_made"), ("PKatt", "pens_att"), ("Sh", "shots"),
+        ("SoT", "shots_on_target"), ("CrdY", "cards_yellow"), ("CrdR", "cards_red"), ("Touches", "touches"),
+        ("Tkl", "tackles"), ("Int", "interceptions"), ("Blocks", "blocks"), ("xG", "xg"), ("npxG", "npxg"),
+        ("xAG", "xg_assist"), ("SCA", "sca"), ("GCA", "gca"), ("Cmp", "passes_completed"), ("Att", "passes"),
+        ("Cmp%", "passes_pct"), ("PrgP", "progressive_passes"), ("Carries", "carries"),
+        ("PrgC", "progressive_carries"), ("Att", "take_ons"), ("Succ", "take_ons_won")]),
+    ("passing", PLAYER_COLUMNS + [
+        ("Cmp", "passes_completed"), ("Att", "passes"), ("Cmp%", "passes_pct"), ("TotDist", "passes_total_distance"),
+        ("PrgDist", "passes_progressive_distance"), ("Cmp", "passes_completed_short"), ("Att", "passes_short"),
+        ("Cmp%", "passes_pct_short"), ("Cmp", "passes_completed_medium"), ("Att", "passes_medium"),
+        ("Cmp%", "passes_pct_medium"), ("Cmp", "passes_completed_long"), ("Att", "passes_long"),
+        ("Cmp%", "passes_pct_long"), ("Ast", "assists"), ("xAG", "xg_assist"), ("xA", "pass_xa"),
+        ("KP", "assisted_shots"), ("1/3", "passes_into_final_third"), ("PPA", "passes_into_penalty_area"),
+        ("CrsPA", "crosses_into_penalty_area"), ("PrgP", "progressive_passes")]),
+    ("passing_types", PLAYER_COLUMNS + [
+        ("Att", "passes"), ("Live", "passes_live"), ("Dead", "passes_dead"), ("FK", "passes_free_kicks"),
+        ("TB", "through_balls"), ("Sw", "passes_switches"), ("Crs", "crosses"), ("TI", "throw_ins"),
+        ("CK", "corner_kicks"), ("In", "corner_kicks_in"), ("Out", "corner_kicks_out"),
+        ("Str", "corner_kicks_straight"), ("Cmp", "passes_completed"), ("Off", "passes_offsides"),
+        ("Blocks", "passes_blocked")]),
+    ("defense", PLAYER_COLUMNS + [
+        ("Tkl", "tackles"), ("TklW", "tackles_won"), ("Def 3rd", "tackles_def_3rd"), ("Mid 3rd", "tackles_mid_3rd"),
+        ("Att 3rd", "tackles_att_3rd"), ("Tkl", "challenge_tackles"), ("Att", "challenges"),
+        ("Tkl%", "challenge_tackles_pct"), ("Lost", "challenges_lost"), ("Blocks", "blocks"),
+        ("Sh", "blocked_shots"), ("Pass", "blocked_passes"), ("Int", "interceptions"),
+        ("Tkl+Int", "tackles_interceptions"), ("Clr", "clearances"), ("Err", "errors")]),
+    ("possession", PLAYER_COLUMNS + [
+        ("Touches", "touches"), ("Def Pen", "touches_def_pen_area"), ("Def 3rd", "touches_def_3rd"),
+        ("Mid 3rd", "touches_mid_3rd"), ("Att 3rd", "touches_att_3rd"), ("Att Pen", "touches_att_pen_area"),
+        ("Live", "touches_live_ball"), ("Att", "take_ons"), ("Succ", "take_ons_won"),
+        ("Succ%", "take_ons_won_pct"), ("Tkld", "take_ons_tackled"), ("Tkld%", "take_ons_tackled_pct"),
+        ("Carries", "carries"), ("TotDist", "carries_distance"), ("PrgDist", "carries_progressive_distance"),
+        ("PrgC", "progressive_carries"), ("1/3", "carries_into_final_third"),
+        ("CPA", "carries_into_penalty_area"), ("Mis", "miscontrols"), ("Dis", "dispossessed"),
+        ("Rec", "passes_received"), ("PrgR", "progressive_passes_received")]),
+    ("misc", PLAYER_COLUMNS + [
+        ("CrdY", "cards_yellow"), ("CrdR", "cards_red"), ("2CrdY", "cards_yellow_red"), ("Fls", "fouls"),
+        ("Fld", "fouled"), ("Off", "offsides"), ("Crs", "crosses"), ("Int", "interceptions"),
+        ("TklW", "tackles_won"), ("PKwon", "pens_won"), ("PKcon", "pens_conceded"), ("OG", "own_goals"),
+        ("Recov", "ball_recoveries"), ("Won", "aerials_won"), ("Lost", "aerials_lost"),
+        ("Won%", "aerials_won_pct")]),
+]
+KEEPER_COLUMNS = [
+    ("Player", "player"), ("Nation", "nationality"), ("Age", "age"), ("Min", "minutes"),
+    ("SoTA", "gk_shots_on_target_against"), ("GA", "gk_goals_against"), ("Saves", "gk_saves"),
+    ("Save%", "gk_save_pct"), ("PSxG", "gk_psxg"), ("Cmp", "gk_passes_completed_launched"),
+    ("Att", "gk_passes_launched"), ("Cmp%", "gk_passes_pct_launched"), ("Att (GK)", "gk_passes"),
+    ("Thr", "gk_passes_throws"), ("Launch%", "gk_pct_passes_launched"), ("AvgLen", "gk_passes_length_avg"),
+    ("Att", "gk_goal_kicks"), ("Launch%", "gk_pct_goal_kicks_launched"), ("AvgLen", "gk_goal_kick_length_avg"),
+    ("Opp", "gk_crosses"), ("Stp", "gk_crosses_stopped"), ("Stp%", "gk_crosses_stopped_pct"),
+    ("#OPA", "gk_def_actions_outside_pen_area"), ("AvgDist", "gk_avg_distance_def_actions")]
+SHOTS_COLUMNS = [("Minute", "minute"), ("Player", "player"), ("Squad", "team"), ("xG", "xg_shot"),
+                 ("PSxG", "psxg_shot"), ("Outcome", "outcome"), ("Distance", "distance"), ("Body Part", "body_part")]
+FIXTURE_COLUMNS = [
+    ("Wk", "gameweek"), ("Day", "dayofweek"), ("Date", "date"), ("Time", "start_time"), ("Home", "home_team"),
+    ("xG", "home_xg"), ("Score", "score"), ("xG", "away_xg"), ("Away", "away_team"), ("Attendance", "attendance"),
+    ("Venue", "venue"), ("Referee", "referee"), ("Match Report", "match_report"), ("Notes", "notes")]
+MATCHLOG_COLUMNS = [
+    ("Date", "date"), ("Time", "start_time"), ("Comp", "comp"), ("Round", "round"), ("Day", "dayofweek"),
+    ("Venue", "venue"), ("Result", "result"), ("GF", "goals_for"), ("GA", "goals_against"),
+    ("Opponent", "opponent"), ("xG", "xg_for"), ("xGA", "xg_against"), ("Poss", "possession"),
+    ("Attendance", "attendance"), ("Captain", "captain"), ("Formation", "formation"), ("Referee", "referee"),
+    ("Match Report", "match_report"), ("Notes", "notes")]
+LEAGUE_TABLE_COLUMNS = [
+    ("Rk", "rank"), ("Squad", "team"), ("MP", "games"), ("W", "wins"), ("D", "ties"), ("L", "losses"),
+    ("GF", "goals_for"), ("GA", "goals_against"), ("GD", "goal_diff"), ("Pts", "points"),
+    ("Pts/MP", "points_avg")]
+SQUAD_STANDARD_COLUMNS = [
+    ("Squad", "team"), ("# Pl", "players_used"), ("MP", "games"), ("Starts", "games_starts"),
+    ("Min", "minutes"), ("90s", "minutes_90s"), ("Gls", "goals"), ("Ast", "assists"), ("G+A", "goals_assists"),
+    ("PK", "pens_made"), ("PKatt", "pens_att"), ("CrdY", "cards_yellow"), ("CrdR", "cards_red")]
+SQUAD_KEEPER_COLUMNS = [
+    ("Squad", "team"), ("# Pl", "gk_players_used"), ("MP", "gk_games"), ("Min", "gk_minutes"),
+    ("GA", "gk_goals_against"), ("GA90", "gk_goals_against_per90"), ("SoTA", "gk_shots_on_target_against"),
+    ("Saves", "gk_saves"), ("Save%", "gk_save_pct"), ("CS", "gk_clean_sheets")]
+SQUAD_SHOOTING_COLUMNS = [
+    ("Squad", "team"), ("# Pl", "players_used"), ("Gls", "goals"), ("Sh", "shots"), ("SoT", "shots_on_target"),
+    ("SoT%", "shots_on_target_pct")]
+
+
+def slugify(name):
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-")
+
+
+def make_team_names(count, rng):
+    """Distinct team names, none of which contains another (the scraper matches captions by team name)."""
+    candidates = [p + m + s for p in TOWN_PREFIXES for m in TOWN_MIDDLES for s in TOWN_SUFFIXES]
+    rng.shuffle(candidates)
+    names = []
+    for candidate in candidates:
+        if any(candidate in name or name in candidate for name in names):
+            continue
+        names.append(candidate)
+        if len(names) == count:
+            return names
+    raise ValueError(f"Cannot generate more than {len(names)} distinct team names.")
+
+
+def round_robin(teams):
+    """Double round robin schedule (circle method): list of matchweeks, each a list of (home, away)."""
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)  # Bye
+    n = len(teams)
+    first_half = []
+    for _ in range(n - 1):
+        week = [(teams[i], teams[n - 1 - i]) for i in range(n // 2)]
+        if len(first_half) % 2:
+            week[0] = week[0][::-1]  # Alternate home and away for the fixed team
+        first_half.append([(h, a) for h, a in week if h is not None and a is not None])
+        teams.insert(1, teams.pop())
+    second_half = [[(a, h) for h, a in week] for week in first_half]
+    return first_half + second_half
+
+
+class SyntheticLeague:
+    """A deterministic synthetic league: same seed, same teams, fixtures and match statistics."""
+
+    def __init__(self, name="Synthetic League", teams=12, seasons=1, squad_size=18, gender="M",
+                 comp_id=900, first_season=2023, tier=1, seed=0):
+        if teams < 2:
+            raise ValueError("A league needs at least 2 teams.")
+        rng = random.Random(f"{seed}:{comp_id}")
+        self.name = name
+        self.slug = slugify(name)
+        self.comp_id = comp_id
+        self.gender = gender
+        self.tier = tier
+        self.seed = seed
+        self.seasons = [f"{year}-{year + 1}" for year in range(first_season + seasons - 1, first_season - 1, -1)]
+        self.teams = make_team_names(teams, rng)
+        self.team_ids = {team: f"{comp_id:03d}{i:05x}" for i, team in enumerate(self.teams)}
+        self.team_by_id = {team_id: team for team, team_id in self.team_ids.items()}
+        self.squads = {}
+        for team in self.teams:
+            players = set()
+            while len(players) < squad_size:
+                players.add(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+            self.squads[team] = [(player, rng.choice(NATIONS), f"{rng.randint(18, 35)}-{rng.randint(0, 364):03d}")
+                                 for player in sorted(players)]
+        self.schedule = round_robin(self.teams)
+
+    # URLs
+    def history_path(self):
+        return f"/en/comps/{self.comp_id}/history/{self.slug}-Seasons"
+
+    def season_path(self, season):
+        return f"/en/comps/{self.comp_id}/{season}/{season}-{self.slug}-Stats"
+
+    def fixtures_path(self, season):
+        return f"/en/comps/{self.comp_id}/{season}/schedule/{season}-{self.slug}-Scores-and-Fixtures"
+
+    def squad_path(self, team, season):
+        return f"/en/squads/{self.team_ids[team]}/{season}/{slugify(team)}-Stats"
+
+    def matchlog_path(self, team, season):
+        return (f"/en/squads/{self.team_ids[team]}/{season}/matchlogs/c{self.comp_id}/schedule/"
+                f"{slugify(team)}-Scores-and-Fixtures-{self.slug}")
+
+    def match_id(self, season, week, index):
+        return f"{self.comp_id:03d}{self.seasons.index(season):02d}{week:03d}{index:02d}"
+
+    def match_path(self, season, week, index):
+        home, away = self.schedule[week][index]
+        return f"/en/matches/{self.match_id(season, week, index)}/{slugify(home)}-{slugify(away)}-{self.slug}"
+
+    def parse_match_id(self, match_id):
+        """Returns (season, week, index) for a match ID, or None if it doesn't belong to this league."""
+        if len(match_id) != 10 or not match_id.isdigit() or int(match_id[:3]) != self.comp_id:
+            return None
+        season_index, week, index = int(match_id[3:5]), int(match_id[5:8]), int(match_id[8:])
+        if season_index >= len(self.seasons) or week >= len(self.schedule) or index >= len(self.schedule[week]):
+            return None
+        return self.seasons[season_index], week, index
+
+    # Data
+    def matches(self, season):
+        """All the matches of a season as (week, index, home, away)."""
+        for week, fixtures in enumerate(self.schedule):
+            for index, (home, away) in enumerate(fixtures):
+                yield week, index, home, away
+
+    def match_date(self, season, week):
+        start = datetime.date(int(season[:4]), 8, 10)
+        return start + datetime.timedelta(days=7 * week)
+
+    @lru_cache(maxsize=4096)
+    def match_stats(self, season, week, index):
+        """
+        Player statistics of a match: {team: {"players": [row dict], "goals": int, "xg": float}}.
+        Team goals are the sum of the players' goals, so season totals can be cross-checked.
+        """
+        home, away = self.schedule[week][index]
+        rng = random.Random(f"{self.seed}:{self.match_id(season, week, index)}")
+        result = {}
+        for team in (home, away):
+            squad = self.squads[team]
+            starters = [0] + rng.sample(range(1, len(squad)), 10)  # The first player is the goalkeeper
+            bench = [i for i in range(1, len(squad)) if i not in starters]
+            subs = rng.sample(bench, min(3, len(bench)))
+            minutes = {i: 90 for i in starters}
+            for sub in subs:
+                replaced = rng.choice([i for i in starters[1:] if minutes[i] == 90])
+                minute = rng.randint(46, 89)
+                minutes[replaced], minutes[sub] = minute, 90 - minute
+            goals = rng.choices(range(6), weights=[28, 33, 22, 11, 4, 2])[0]
+            outfield = [i for i in minutes if i != 0]
+            scorers = Counter(rng.choice(outfield) for _ in range(goals))
+            assisters = Counter(rng.choice(outfield) for _ in range(goals) if rng.random() < 0.7)
+            players = []
+            for position, i in enumerate(list(starters) + subs):
+                name, nation, age = squad[i]
+                gls = scorers[i]
+                shots = gls + rng.randint(0, 3)
+                players.append({
+                    "player": name, "shirtnumber": i + 1, "nationality": nation,
+                    "position": "GK" if i == 0 else POSITIONS[i % len(POSITIONS)], "age": age,
+                    "minutes": minutes[i], "goals": gls, "assists": assisters[i], "pens_made": 0, "pens_att": 0,
+                    "shots": shots, "shots_on_target": gls + rng.randint(0, shots - gls),
+                    "cards_yellow": int(rng.random() < 0.1), "cards_red": int(rng.random() < 0.01),
+                    "xg": round(gls * 0.3 + rng.random() * 0.1, 1), "starter": position < 11,
+                })
+            result[team] = {"players": players, "goals": goals,
+                            "xg": round(sum(p["xg"] for p in players), 1)}
+        return result
+
+    def result_row(self, season, week, index):
+        home, away = self.schedule[week][index]
+        stats = self.match_stats(season, week, index)
+        return home, away, stats[home], stats[away]
+
+
+def render_cell(value, data_stat, tag="td"):
+    if isinstance(value, tuple):  # (text, href)
+        text, href = value
+        content = f'<a href="{escape(href)}">{escape(str(text))}</a>'
+    else:
+        content = escape(str(value))
+    return f'<{tag} data-stat="{data_stat}">{content}</{tag}>'
+
+
+def render_table(table_id, caption, columns, rows, over_header=None, row_header=True):
+    """FBref-style table: optional over-header row, header row with data-stat, first cell of each row in a <th>."""
+    parts = [f'<table class="stats_table sortable" id="{table_id}" data-cols-to-freeze=",1">',
+             f"<caption>{escape(caption)}</caption>", "<thead>"]
+    if over_header:
+        parts.append('<tr class="over_header">' + "".join(
+            f'<th colspan="{span}" class="over_header">{escape(label)}</th>' for label, span in over_header) + "</tr>")
+    parts.append("<tr>" + "".join(f'<th aria-label="{escape(label)}" data-stat="{stat}" scope="col">{escape(label)}</th>'
+                                  for label, stat in columns) + "</tr>")
+    parts.append("</thead><tbody>")
+    for row in rows:
+        cells = []
+        for i, ((label, stat), value) in enumerate(zip(columns, row)):
+            cells.append(render_cell(value, stat, "th" if i == 0 and row_header else "td"))
+        parts.append("<tr>" + "".join(cells) + "</tr>")
+    parts.append("</tbody></table>")
+    return "".join(parts)
+
+
+def table_container(table_id, table_html, current=True, commented=False):
+    """Wraps a table in its FBref container. commented=True hides it in an HTML comment, as FBref does."""
+    inner = f'<div class="table_container{" current" if current else ""}" id="div_{table_id}">{table_html}</div>'
+    if commented:
+        inner = f"<!--\n{inner}\n-->"
+    return f'<div class="table_wrapper" id="all_{table_id}">{inner}</div>'
+
+
+def page(title, body):
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{escape(title)} | FBref.com</title>'
+            f'</head><body><div id="wrap"><div id="content" role="main"><h1>{escape(title)}</h1>{body}</div></div>'
+            "</body></html>")
+
+
+class MockFBref:
+    """Renders the pages of one or more synthetic leagues."""
+
+    def __init__(self, leagues):
+        self.leagues = list(leagues)
+        self.by_comp_id = {league.comp_id: league for league in self.leagues}
+        self.routes = [
+            (re.compile(r"^/en/comps/?$"), self.comps_page, "comps"),
+            (re.compile(r"^/en/comps/(\d+)/history/[^/]+$"), self.history_page, "history"),
+            (re.compile(r"^/en/comps/(\d+)/([\d-]+)/schedule/[^/]+$"), self.fixtures_page, "fixtures"),
+            (re.compile(r"^/en/comps/(\d+)/([\d-]+)/[^/]+$"), self.season_page, "season"),
+            (re.compile(r"^/en/squads/(\w+)/([\d-]+)/matchlogs/c(\d+)/schedule/[^/]+$"), self.matchlog_page,
+             "matchlog"),
+            (re.compile(r"^/en/squads/(\w+)/([\d-]+)/[^/]+$"), self.squad_page, "squad"),
+            (re.compile(r"^/en/matches/(\w+)/[^/]+$"), self.match_page, "match"),
+        ]
+
+    def render(self, path):
+        """Returns (page type, html), or (None, None) if the path is unknown."""
+        path = path.split("?")[0]
+        for pattern, handler, page_type in self.routes:
+            match = pattern.match(path)
+            if match:
+                html = handler(*match.groups())
+                return (page_type, html) if html is not None else (None, None)
+        return None, None
+
+    def _league_season(self, comp_id, season):
+        league = self.by_comp_id.get(int(comp_id))
+        if league is None or season not in league.seasons:
+            return None
+        return league
+
+    def _team_league(self, team_id, season):
+        for league in self.leagues:
+            team = league.team_by_id.get(team_id)
+            if team is not None and season in league.seasons:
+                return league, team
+        return None, None
+
+    def comps_page(self):
+        body = []
+        for tier in (1, 2):
+            table_id = f"comps_{tier}_fa_club_league_senior"
+            columns = [("Competition Name", "league_name"), ("Gender", "gender"), ("Governing Body", "governing_body"),
+                       ("First Season", "first_season"), ("Last Season", "last_season")]
+            rows = [[(league.name, league.history_path()), league.gender, "Synthetic FA", league.seasons[-1],
+                     league.seasons[0]] for league in self.leagues if league.tier == tier]
+            caption = "Club Leagues - Top Tier" if tier == 1 else "Club Leagues - Second Tier"
+            body.append(table_container(table_id, render_table(table_id, caption, columns, rows)))
+        return page("Football Competitions", "".join(body))
+
+    def history_page(self, comp_id):
+        league = self.by_comp_id.get(int(comp_id))
+        if league is None:
+            return None
+        columns = [("Season", "year_id"), ("Competition Name", "comp_name"), ("# Squads", "teams")]
+        rows = [[(season, league.season_path(season)), league.name, len(league.teams)] for season in league.seasons]
+        return page(f"{league.name} Seasons", table_container("seasons", render_table("seasons", f"{league.name} Seasons",
+                                                                                       columns, rows)))
+
+    def _inner_nav(self, league, season):
+        return (f'<div id="inner_nav"><ul><li><a href="{league.season_path(season)}">{season} {escape(league.name)} '
+                f'Stats</a></li><li><a href="{league.fixtures_path(season)}">Scores &amp; Fixtures</a></li></ul></div>')
+
+    def _season_totals(self, league, season):
+        """League table and squad totals for and against, aggregated from the match statistics."""
+        totals = {team: Counter() for team in league.teams}
+        against = {team: Counter() for team in league.teams}
+        home_away = {team: {"home": Counter(), "away": Counter()} for team in league.teams}
+        players_used = {team: set() for team in league.teams}
+        for week, index, home, away in league.matches(season):
+            stats = league.match_stats(season, week, index)
+            for team, opponent, venue in ((home, away, "home"), (away, home, "away")):
+                gf, ga = stats[team]["goals"], stats[opponent]["goals"]
+                outcome = "W" if gf > ga else "D" if gf == ga else "L"
+                for record in (totals[team], home_away[team][venue]):
+                    record.update({"MP": 1, outcome: 1, "GF": gf, "GA": ga, "Pts": {"W": 3, "D": 1, "L": 0}[outcome]})
+                for side, target in ((stats[team], totals[team]), (stats[opponent], against[team])):
+                    for p in side["players"]:
+                        target.update({"Gls": p["goals"], "Ast": p["assists"],
+                                       "PK": p["pens_made"], "PKatt": p["pens_att"], "CrdY": p["cards_yellow"],
+                                       "CrdR": p["cards_red"], "Sh": p["shots"], "SoT": p["shots_on_target"],
+                                       "Starts": int(p["starter"])})
+                players_used[team].update(p["player"] for p in stats[team]["players"])
+        return totals, against, home_away, players_used
+
+    def season_page(self, comp_id, season):
+        league = self._league_season(comp_id, season)
+        if league is None:
+            return None
+        totals, against, home_away, players_used = self._season_totals(league, season)
+        standings = sorted(league.teams, key=lambda t: (-totals[t]["Pts"], -(totals[t]["GF"] - totals[t]["GA"]),
+                                                        -totals[t]["GF"], t))
+        body = [self._inner_nav(league, season)]
+
+        def record(r):
+            mp = r["MP"]
+            return [mp, r["W"], r["D"], r["L"], r["GF"], r["GA"], f"{r['GF'] - r['GA']:+d}", r["Pts"],
+                    f"{r['Pts'] / mp:.2f}" if mp else "0.00"]
+
+        overall_id = f"results{season}{league.comp_id}1_overall"
+        rows = [[rank, (team, league.squad_path(team, season))] + record(totals[team])
+                for rank, team in enumerate(standings, start=1)]
+        body.append(table_container(overall_id, render_table(overall_id, f"{league.name} Table", LEAGUE_TABLE_COLUMNS,
+                                                             rows)))
+        home_away_id = f"results{season}{league.comp_id}1_home_away"
+        columns = LEAGUE_TABLE_COLUMNS[:2] + [(label, f"home_{stat}") for label, stat in LEAGUE_TABLE_COLUMNS[2:]] + \
+            [(label, f"away_{stat}") for label, stat in LEAGUE_TABLE_COLUMNS[2:]]
+        rows = [[rank, (team, league.squad_path(team, season))] + record(home_away[team]["home"]) +
+                record(home_away[team]["away"]) for rank, team in enumerate(standings, start=1)]
+        body.append(table_container(home_away_id, render_table(
+            home_away_id, f"{league.name} Table", columns, rows, over_header=[("", 2), ("Home", 9), ("Away", 9)]),
+            current=False))
+
+        title = f"{season} {league.name}"
+        for side, records, prefix in (("for", totals, ""), ("against", against, "vs ")):
+            current = side == "for"
+            standard_rows, keeper_rows, shooting_rows = [], [], []
+            for team in league.teams:
+                r = records[team]
+                squad = (f"{prefix}{team}", league.squad_path(team, season))
+                minutes = 90 * totals[team]["MP"]  # FBref squad minutes are match minutes, not player minutes
+                standard_rows.append([squad, len(players_used[team]), totals[team]["MP"], r["Starts"],
+                                      f"{minutes:,}", f"{minutes / 90:.1f}", r["Gls"], r["Ast"], r["Gls"] + r["Ast"], r["PK"],
+                                      r["PKatt"], r["CrdY"], r["CrdR"]])
+                conceded = against[team] if side == "for" else totals[team]
+                mp = totals[team]["MP"]
+                keeper_rows.append([squad, 1, mp, mp * 90, conceded["Gls"], f"{conceded['Gls'] / mp:.2f}",
+                                    conceded["SoT"], conceded["SoT"] - conceded["Gls"],
+                                    f"{100 * (conceded['SoT'] - conceded['Gls']) / conceded['SoT']:.1f}"
+                                    if conceded["SoT"] else "", 0])
+                shooting_rows.append([squad, len(players_used[team]), r["Gls"], r["Sh"], r["SoT"],
+                                      f"{100 * r['SoT'] / r['Sh']:.1f}" if r["Sh"] else ""])
+            for table_id, caption, columns, rows, commented in (
+                    (f"stats_squads_standard_{side}", f"Squad Standard Stats {title}", SQUAD_STANDARD_COLUMNS,
+                     standard_rows, False),
+                    (f"stats_squads_keeper_{side}", f"Squad Goalkeeping {title}", SQUAD_KEEPER_COLUMNS, keeper_rows,
+                     False),
+                    (f"stats_squads_shooting_{side}", f"Squad Shooting {title}", SQUAD_SHOOTING_COLUMNS,
+                     shooting_rows, True)):
+                body.append(table_container(table_id, render_table(table_id, caption, columns, rows,
+                                                                   over_header=[("", len(columns))]),
+                                            current=current, commented=commented))
+        return page(f"{title} Stats", "".join(body))
+
+    def fixtures_page(self, comp_id, season):
+        league = self._league_season(comp_id, season)
+        if league is None:
+            return None
+        rows = []
+        for week, index, home, away in league.matches(season):
+            _, _, home_stats, away_stats = league.result_row(season, week, index)
+            date = league.match_date(season, week)
+            rows.append([week + 1, date.strftime("%a"), date.isoformat(), "15:00",
+                         (home, league.squad_path(home, season)), home_stats["xg"],
+                         f"{home_stats['goals']}–{away_stats['goals']}", away_stats["xg"],
+                         (away, league.squad_path(away, season)), f"{1000 + 37 * (week + index) % 9000:,}",
+                         f"{home} Stadium", "Jo Referee", ("Match Report", league.match_path(season, week, index)), ""])
+        table_id = f"sched_{season}_{league.comp_id}_1"
+        return page(f"{season} {league.name} Scores & Fixtures", table_container(
+            table_id, render_table(table_id, f"Scores & Fixtures {season} {league.name}", FIXTURE_COLUMNS, rows)))
+
+    def _matchlog_table(self, league, team, season):
+        rows = []
+        for week, index, home, away in league.matches(season):
+            if team not in (home, away):
+                continue
+            venue = "Home" if team == home else "Away"
+            opponent = away if team == home else home
+            stats = league.match_stats(season, week, index)
+            gf, ga = stats[team]["goals"], stats[opponent]["goals"]
+            date = league.match_date(season, week)
+            rows.append([date.isoformat(), "15:00", (league.name, league.season_path(season)),
+                         f"Matchweek {week + 1}", date.strftime("%a"), venue,
+                         "W" if gf > ga else "D" if gf == ga else "L", gf, ga,
+                         (opponent, league.squad_path(opponent, season)), stats[team]["xg"], stats[opponent]["xg"],
+                         50, "", stats[team]["players"][1]["player"], "4-3-3", "Jo Referee",
+                         ("Match Report", league.match_path(season, week, index)), ""])
+        return table_container("matchlogs_for", render_table("matchlogs_for", f"Scores & Fixtures {season} {team}",
+                                                             MATCHLOG_COLUMNS, rows))
+
+    def squad_page(self, team_id, season):
+        league, team = self._team_league(team_id, season)
+        if league is None:
+            return None
+        players = Counter()
+        for week, index, home, away in league.matches(season):
+            if team in (home, away):
+                for p in league.match_stats(season, week, index)[team]["players"]:
+                    players[p["player"]] += p["minutes"]
+        standard_id = f"stats_standard_{league.comp_id}"
+        standard = render_table(standard_id, f"Standard Stats {season} {team}: {league.name}",
+                                [("Player", "player"), ("Min", "minutes")], sorted(players.items()))
+        body = self._matchlog_table(league, team, season) + table_container(standard_id, standard, commented=True)
+        return page(f"{season} {team} Stats, {league.name}", body)
+
+    def matchlog_page(self, team_id, season, comp_id):
+        league, team = self._team_league(team_id, season)
+        if league is None or league.comp_id != int(comp_id):
+            return None
+        return page(f"{season} {team} Match Logs (Scores & Fixtures), {league.name}",
+                    self._matchlog_table(league, team, season))
+
+    def match_page(self, match_id):
+        for league in self.leagues:
+            parsed = league.parse_match_id(match_id)
+            if parsed:
+                break
+        else:
+            return None
+        season, week, index = parsed
+        home, away = league.schedule[week][index]
+        stats = league.match_stats(season, week, index)
+        rng = random.Random(f"{league.seed}:{match_id}:details")
+        body = [f'<div class="scorebox"><strong>{escape(home)}</strong> {stats[home]["goals"]} - '
+                f'{stats[away]["goals"]} <strong>{escape(away)}</strong></div>']
+        for team in (home, away):
+            team_id = league.team_ids[team]
+            players = stats[team]["players"]
+            for suffix, columns in MATCH_PLAYER_TABLES:
+                table_id = f"stats_{team_id}_{suffix}"
+                rows = []
+                for p in players:
+                    row = []
+                    for label, stat in columns:
+                        if stat in p:
+                            row.append(p[stat])
+                        elif label.endswith("%"):
+                            row.append(f"{rng.uniform(40, 100):.1f}")
+                        else:
+                            row.append(rng.randint(0, 12))
+                    rows.append(row)
+                over_header = [("", 6), ("Performance", len(columns) - 6)]
+                body.append(table_container(table_id, render_table(table_id, f"{team} Player Stats Table", columns,
+                                                                   rows, over_header=over_header),
+                                            current=suffix == "summary"))
+        for team, opponent in ((home, away), (away, home)):
+            keeper = stats[team]["players"][0]
+            conceded = stats[opponent]["goals"]
+            sota = sum(p["shots_on_target"] for p in stats[opponent]["players"])
+            row = [keeper["player"], keeper["nationality"], keeper["age"], keeper["minutes"], sota, conceded,
+                   sota - conceded, f"{100 * (sota - conceded) / sota:.1f}" if sota else ""]
+            row += [rng.randint(0, 30) for _ in KEEPER_COLUMNS[len(row):]]
+            table_id = f"keeper_stats_{league.team_ids[team]}"
+            body.append(table_container(table_id, render_table(table_id, f"{team} Goalkeeper Stats Table",
+                                                               KEEPER_COLUMNS, [row],
+                                                               over_header=[("", 4), ("Shot Stopping", 20)])))
+        shots = []
+        for team in (home, away):
+            for p in stats[team]["players"]:
+                for _ in range(p["shots"]):
+                    shots.append([rng.randint(1, 90), p["player"], team, f"{rng.random() / 2:.2f}",
+                                  f"{rng.random() / 2:.2f}", "Saved", rng.randint(5, 30), "Right Foot"])
+        shots.sort(key=lambda s: s[0])
+        body.append(table_container("shots_all", render_table("shots_all", "Shots Table", SHOTS_COLUMNS, shots),
+                                    commented=True))
+        for team in (home, away):
+            table_id = f"shots_{league.team_ids[team]}"
+            body.append(table_container(table_id, render_table(
+                table_id, f"{team} Shots Table", SHOTS_COLUMNS, [s for s in shots if s[2] == team]),
+                current=False, commented=True))
+        date = league.match_date(season, week)
+        return page(f"{home} vs. {away} Match Report – {date:%A %B %d, %Y}", "".join(body))
+
+
+class MockFBrefServer(ThreadingHTTPServer):
+    """
+    HTTP server for MockFBref pages with optional fault injection:
+    - latency/latency_jitter: seconds added to every response
+    - throttle_rate: probability of answering 429 with a Retry-After of retry_after seconds
+    - rate_limit/rate_window: answer 429 once more than rate_limit requests arrive within rate_window seconds
+    - truncate_rate: probability of closing the connection halfway through the body
+    """
+    daemon_threads = True
+
+    def __init__(self, site, host="127.0.0.1", port=0, latency=0.0, latency_jitter=0.0, throttle_rate=0.0,
+                 retry_after=1, rate_limit=None, rate_window=60.0, truncate_rate=0.0, seed=0):
+        super().__init__((host, port), MockFBrefHandler)
+        self.site = site
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.truncate_rate = truncate_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.stats = Counter()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def decide(self):
+        """Returns the fault to inject in the next response ("throttle", "truncate" or None) and its latency."""
+        with self.lock:
+            now = time.monotonic()
+            self.stats["requests"] += 1
+            while self.recent and now - self.recent[0] > self.rate_window:
+                self.recent.popleft()
+            self.recent.append(now)
+            latency = self.latency + self.rng.uniform(0, self.latency_jitter)
+            if self.rate_limit is not None and len(self.recent) > self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return "throttle", latency
+            if self.rng.random() < self.throttle_rate:
+                return "throttle", latency
+            if self.rng.random() < self.truncate_rate:
+                return "truncate", latency
+            return None, latency
+
+    def record(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def start(self):
+        """Serve in a background thread and return the server."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class MockFBrefHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+    def do_GET(self):
+        server = self.server
+        fault, latency = server.decide()
+        if latency > 0:
+            time.sleep(latency)
+        if fault == "throttle":
+            server.record("status_429")
+            self._send(429, b"Rate limited", {"Retry-After": str(server.retry_after)})
+            return
+        page_type, html = server.site.render(self.path)
+        if html is None:
+            server.record("status_404")
+            self._send(404, b"Page not found")
+            return
+        server.record(f"page_{page_type}")
+        body = html.encode("utf-8")
+        if fault == "truncate":
+            server.record("truncated")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        server.record("status_200")
+        self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (e.g. its timeout is shorter than the injected latency)
+            self.server.record("client_disconnected")
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+def build_site(teams=12, seasons=1, name="Synthetic League", gender="M", seed=0):
+    """A site with the requested top tier league, plus a small second tier league (FBref lists both tiers)."""
+    top = SyntheticLeague(name=name, teams=teams, seasons=seasons, gender=gender, comp_id=900, tier=1, seed=seed)
+    second = SyntheticLeague(name=f"{name} Two", teams=4, seasons=1, gender=gender, comp_id=901, tier=2, seed=seed)
+    return MockFBref([top, second])
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--teams", type=int, default=12, help="Number of teams in the synthetic league")
+    parser.add_argument("--seasons", type=int, default=1, help="Number of seasons in the synthetic league")
+    parser.add_argument("--league", default="Synthetic League", help="Name of the synthetic league")
+    parser.add_argument("--gender", default="M", choices=["M", "F"])
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Random extra latency, in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of a 429 response")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After of 429 responses, in seconds")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests allowed per rate window")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="Rate window, in seconds")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Probability of a truncated response")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_from_args(args, port=0):
+    site = build_site(args.teams, args.seasons, args.league, args.gender, args.seed)
+    return MockFBrefServer(site, port=port, latency=args.latency, latency_jitter=args.latency_jitter,
+                           throttle_rate=args.throttle_rate, retry_after=args.retry_after, rate_limit=args.rate_limit,
+                           rate_window=args.rate_window, truncate_rate=args.truncate_rate, seed=args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic FBref pages locally.")
+    add_server_arguments(parser)
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    server = server_from_args(args, args.port)
+    print(f"Mock FBref serving {args.teams} teams on {server.base_url}")
+    print(f"Run the scraper with FBREF_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,324 @@
+"""
+Schema canary: validate FBref page layouts before spending the request budget on a full season.
+
+Fetches one sample of each page type (season stats, fixtures, squad page, match report) and checks the
+expected table IDs, header sets, table counts and data-stat columns against the versioned registry in
+page_schemas.json. When a page has drifted, the run is aborted (or rerouted to a JavaScript backend if
+the tables only appear once the page is rendered) and the drift is recorded for review.
+
+The sampled pages are kept and handed to the scraper the first time it asks for them, so the canary
+costs no extra requests for pages the run needs anyway.
+
+Usage:
+    run_schema_canary(competition_url)  # raises SchemaDriftError if the layout changed
+"""
+import datetime
+import os
+import re
+
+from bs4 import BeautifulSoup, Comment
+
+import utils
+from utils import load_cache, save_cache
+
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_schemas.json")
+DRIFT_LOG = os.path.join(os.getcwd(), "Competitions", "schema_drift.json")
+
+
+class SchemaDriftError(RuntimeError):
+    """A sampled page doesn't match the expected layout."""
+
+
+class ReplayFetcher:
+    """
+    Fetch backend that serves the pages sampled by the canary once, then delegates to the wrapped backend.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.pages = {}
+
+    def keep(self, url, html):
+        self.pages[url] = html
+
+    def fetch(self, url, table_name=None):
+        html = self.pages.pop(url, None)  # Serve each sampled page once, so it doesn't stay in memory
+        if html is not None:
+            return html
+        return self.backend.fetch(url, table_name)
+
+    def close(self):
+        self.pages.clear()
+        self.backend.close()
+
+
+def load_registry(registry_file=REGISTRY_FILE):
+    registry = load_cache(registry_file)
+    if not registry:
+        raise FileNotFoundError(f"Schema registry {registry_file} not found.")
+    return registry
+
+
+def table_headers(table):
+    """Column names as read by the scraper: the last header row (the first ones only group columns)."""
+    thead = table.find('thead')
+    if not thead:
+        return [], set()
+    header_rows = thead.find_all('tr')
+    if not header_rows:
+        return [], set()
+    header_cells = header_rows[-1].find_all('th')
+    headers = [cell.text.strip() for cell in header_cells]
+    data_stats = {cell.get('data-stat') for cell in header_cells if cell.get('data-stat')}
+    return headers, data_stats
+
+
+def table_rows(table):
+    body = table.find('tbody')
+    return body.find_all('tr') if body else []
+
+
+def matches_spec(table, spec):
+    """True if the table is the one described by the spec (by ID, ID pattern and/or caption)."""
+    table_id = table.get('id') or ''
+    if 'id' in spec and table_id != spec['id']:
+        return False
+    if 'id_pattern' in spec and not re.search(spec['id_pattern'], table_id):
+        return False
+    if 'caption' in spec:
+        caption = table.find('caption')
+        if not caption or spec['caption'] not in caption.text:
+            return False
+    return True
+
+
+def describe_spec(spec):
+    return " ".join(f"{key}={spec[key]!r}" for key in ('id', 'id_pattern', 'caption') if key in spec)
+
+
+def commented_tables(soup):
+    """Tables hidden in HTML comments (FBref ships some of them this way): the scraper can't see them."""
+    tables = []
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        if '<table' in comment:
+            tables.extend(BeautifulSoup(comment, 'html.parser').find_all('table'))
+    return tables
+
+
+def check_table_spec(soup, tables, spec):
+    """Issues found for one table spec of the registry."""
+    issues = []
+    name = describe_spec(spec)
+    found = [table for table in tables if matches_spec(table, spec)]
+    if not found:
+        if any(matches_spec(table, spec) for table in commented_tables(soup)):
+            issues.append(f"Table {name} is only inside an HTML comment.")
+        else:
+            issues.append(f"Table {name} not found.")
+        return issues
+    if 'count' in spec and len(found) != spec['count']:
+        issues.append(f"Expected {spec['count']} tables {name}, found {len(found)}.")
+
+    for table in found:
+        label = table.get('id') or name
+        headers, data_stats = table_headers(table)
+        missing_headers = [header for header in spec.get('headers', []) if header not in headers]
+        if missing_headers:
+            issues.append(f"Table {label} is missing headers {missing_headers}.")
+        rows = table_rows(table)
+        if rows:
+            data_stats |= {cell.get('data-stat') for cell in rows[0].find_all(['th', 'td']) if cell.get('data-stat')}
+        missing_stats = [stat for stat in spec.get('data_stats', []) if stat not in data_stats]
+        if missing_stats:
+            issues.append(f"Table {label} is missing data-stat columns {missing_stats}.")
+        if len(rows) < spec.get('min_rows', 0):
+            issues.append(f"Table {label} has {len(rows)} rows, expected at least {spec['min_rows']}.")
+    return issues
+
+
+def validate_page(html, page_schema):
+    """Returns the list of differences between the page and its schema (empty if the layout is as expected)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    try:
+        tables = soup.find_all('table')
+        issues = []
+        for spec in page_schema.get('tables', []):
+            issues.extend(check_table_spec(soup, tables, spec))
+        for link in page_schema.get('links', []):
+            container = soup.find(id=link['container_id'])
+            if not container:
+                issues.append(f"Element #{link['container_id']} not found.")
+            elif not container.find('a', string=link['text']):
+                issues.append(f"Link '{link['text']}' not found in #{link['container_id']}.")
+        return issues
+    finally:
+        soup.decompose()
+
+
+def observed_layout(html):
+    """Table IDs, captions and headers of a page, recorded with the drift so the registry can be updated."""
+    soup = BeautifulSoup(html, 'html.parser')
+    try:
+        layout = []
+        for table in soup.find_all('table'):
+            caption = table.find('caption')
+            headers, data_stats = table_headers(table)
+            layout.append({'id': table.get('id'), 'caption': caption.text.strip() if caption else None,
+                           'headers': headers, 'data_stats': sorted(data_stats), 'rows': len(table_rows(table))})
+        return layout
+    finally:
+        soup.decompose()
+
+
+def record_drift(drift_log, record):
+    """Append a drift record to the drift log (JSON), for review."""
+    os.makedirs(os.path.dirname(drift_log) or ".", exist_ok=True)
+    log = load_cache(drift_log)
+    log.setdefault('drift', []).append(record)
+    save_cache(log, drift_log)
+    print(f"Recorded {record['page_type']} layout drift in {drift_log}.")
+
+
+def find_link(html, table_id, data_stat=None, href_contains=None):
+    """First link of a table (in the cell with the given data-stat), made absolute. table_id can be a regex."""
+    soup = BeautifulSoup(html, 'html.parser')
+    try:
+        table = soup.find('table', {'id': table_id})
+        if not table:
+            return None
+        for row in table_rows(table):
+            cell = row.find(['th', 'td'], {'data-stat': data_stat}) if data_stat else row.find('th')
+            link = cell.find('a') if cell else None
+            if link and link.get('href') and (href_contains is None or href_contains in link['href']):
+                return utils.FBREF_BASE_URL + link['href']
+        return None
+    finally:
+        soup.decompose()
+
+
+def find_fixtures_link(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    try:
+        inner_nav = soup.find('div', {'id': 'inner_nav'})
+        link = inner_nav.find('a', string="Scores & Fixtures") if inner_nav else None
+        return utils.FBREF_BASE_URL + link['href'] if link else None
+    finally:
+        soup.decompose()
+
+
+def run_schema_canary(competition_url, league_url=None, check_competitions=False, on_drift="abort",
+                      browser_fallback=None, drift_log=DRIFT_LOG, registry_file=REGISTRY_FILE, version=None):
+    """
+    Validate one sample of each page type of a season against the schema registry.
+    The league history page (league_url) and the competitions index (check_competitions) are usually
+    read from the JSON caches, so they are only sampled when asked for.
+
+    on_drift: "abort" raises SchemaDriftError, "warn" only records the drift and carries on.
+    browser_fallback: optional JavaScript fetch backend (e.g. BrowserPoolFetcher()). If a drifted page
+    matches the schema once rendered, the rest of the run is rerouted to it instead of aborting.
+    Returns the drift records (empty if every sampled page matches the schema). Pages that can't be
+    retrieved are reported but not recorded as drift, since their layout couldn't be checked.
+    The sampled pages are replayed to the scraper through a ReplayFetcher installed as the fetch backend.
+    If the run is aborted, the sampled pages are dropped and the previous backend is restored.
+    """
+    registry = load_registry(registry_file)
+    version = version or registry['current']
+    schemas = registry['versions'][version]
+
+    # Keep the sampled pages for the scraper, so the canary doesn't cost extra requests
+    previous_backend = utils.get_fetch_backend()
+    if isinstance(previous_backend, ReplayFetcher):
+        replay = previous_backend
+    else:
+        replay = ReplayFetcher(previous_backend)
+        utils.set_fetch_backend(replay)
+    previous_replay_backend = replay.backend
+
+    records = []
+    unresolved = []
+    unchecked = []
+
+    def sample(page_type, url, table_name=None):
+        print(f"Schema canary: checking {page_type} page {url}")
+        html = replay.backend.fetch(url, table_name)
+        if html is None:
+            # A network failure, not a layout change: keep it out of the drift log
+            print(f"Schema canary: could not retrieve the {page_type} page, its layout was not checked.")
+            unchecked.append(page_type)
+            return None
+        issues = validate_page(html, schemas[page_type])
+        if not issues:
+            replay.keep(url, html)
+            return html
+
+        action = "aborted" if on_drift == "abort" else "ignored"
+        if browser_fallback is not None:
+            rendered = browser_fallback.fetch(url, table_name)
+            if rendered is not None and not validate_page(rendered, schemas[page_type]):
+                # The tables are there once the page is rendered: reroute the run to the browser
+                replay.backend = browser_fallback
+                replay.keep(url, rendered)
+                action = "rerouted"
+                html = rendered
+        record = {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'schema_version': version,
+            'page_type': page_type,
+            'url': url,
+            'issues': issues,
+            'action': action,
+            'matching_versions': [other for other, other_schemas in registry['versions'].items()
+                                  if other != version and page_type in other_schemas
+                                  and not validate_page(html, other_schemas[page_type])],
+            'observed': observed_layout(html),
+        }
+        records.append(record)
+        record_drift(drift_log, record)
+        for issue in issues:
+            print(f"Schema canary: {page_type} page drifted: {issue}")
+        if action == "ignored":
+            replay.keep(url, html)  # Carrying on: the scraper will still need the page
+        if action != "rerouted":
+            unresolved.append(record)
+        return html
+
+    try:
+        if check_competitions:
+            sample("comps", utils.FBREF_BASE_URL + "/en/comps/", "comps_1_fa_club_league_senior")
+            utils.respect_fbref_scrape_policy()
+        if league_url:
+            sample("history", league_url, "seasons")
+            utils.respect_fbref_scrape_policy()
+        season_html = sample("season", competition_url, "stats_squads_standard_for")
+        if season_html is not None:
+            fixtures_url = find_fixtures_link(season_html)
+            squad_url = find_link(season_html, "stats_squads_standard_for")
+            if squad_url:
+                utils.respect_fbref_scrape_policy()
+                sample("squad", squad_url, "matchlogs_for")
+            if fixtures_url:
+                utils.respect_fbref_scrape_policy()
+                fixtures_html = sample("fixtures", fixtures_url)
+                # Sample a league match: the squad match logs also list cup and European games, which the
+                # run skips, so sampling one of them would cost an extra request
+                match_url = (find_link(fixtures_html, re.compile(r"^sched_"), "match_report", "/matches/")
+                             if fixtures_html else None)
+                if match_url:
+                    utils.respect_fbref_scrape_policy()
+                    sample("match", match_url)
+
+        if unresolved and on_drift == "abort":
+            raise SchemaDriftError(
+                f"{len(unresolved)} page types don't match schema {version}: "
+                + "; ".join(f"{r['page_type']}: {' '.join(r['issues'])}" for r in unresolved)
+                + f" See {drift_log}.")
+    except BaseException:
+        # The season won't be scraped: don't keep the sampled pages or leave the replay backend installed
+        replay.pages.clear()
+        replay.backend = previous_replay_backend
+        utils.set_fetch_backend(previous_backend)
+        raise
+    if unchecked:
+        print(f"Schema canary: {', '.join(unchecked)} pages could not be retrieved and were not checked.")
+    elif not records:
+        print(f"Schema canary: all sampled pages match schema {version}.")
+    return records
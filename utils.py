@@ -3,14 +3,20 @@ import pandas as pd
 import os
 import json
 import re
+import queue
+import threading
 import requests
 import openpyxl
+import xlsxwriter
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from rapidfuzz import process
 from functools import lru_cache
 from fuzzywuzzy import fuzz
@@ -98,21 +104,259 @@ league_mapping = {
     "USSF Division 2 Professional League": "D2 Pro League"
 }
 
+FBREF_BASE_URL = os.environ.get("FBREF_BASE_URL", "https://fbref.com")  # Root URL to prepend to relative links
+SCRAPE_POLICY_DELAY = float(os.environ.get("FBREF_SCRAPE_DELAY", 6))  # Seconds between requests (10 requests per minute)
+
+PAGE_LOAD_TIMEOUT = 10  # Maximum number of seconds to wait for a page (or one of its tables) to be ready
+
+# Resolve the Edge driver once per process instead of on every browser start
+@lru_cache(maxsize=1)
+def get_edge_driver_path():
+    """
+    Returns the path of a locally cached Edge driver.
+    Set EDGE_DRIVER_PATH to use an existing driver and skip the webdriver_manager lookup entirely.
+    """
+    driver_path = os.environ.get("EDGE_DRIVER_PATH")
+    if driver_path and os.path.exists(driver_path):
+        return driver_path
+    return EdgeChromiumDriverManager().install()
+
 # Initialize Selenium WebDriver
 def init_webdriver():
     options = Options()
     options.add_argument("--headless")  # Run in headless mode
-    service = Service(EdgeChromiumDriverManager().install())
+    service = Service(get_edge_driver_path())
     driver = webdriver.Edge(service=service, options=options)
     return driver
 
+# Wait until the table with the given ID is in the DOM, instead of sleeping a fixed amount of time
+def wait_for_table(driver, table_name, timeout=PAGE_LOAD_TIMEOUT):
+    try:
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.ID, table_name)))
+        return True
+    except TimeoutException:
+        return False
+
 # Load the page and extract HTML content
-def get_page_content(driver, url):
+def get_page_content(driver, url, table_name=None, timeout=PAGE_LOAD_TIMEOUT):
     driver.get(url)
-    time.sleep(10)  # Wait for the page to load
+    if table_name:
+        # Wait for the target table rather than for an arbitrary amount of time
+        if not wait_for_table(driver, table_name, timeout):
+            print(f"Table {table_name} not found within {timeout} seconds on {url}")
+    else:
+        # Without a target table, wait for the document itself to finish loading
+        try:
+            WebDriverWait(driver, timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+        except TimeoutException:
+            print(f"Page {url} did not finish loading within {timeout} seconds")
     html = driver.page_source
     return html
 
+class HttpFetcher:
+    """
+    Fetch backend for pages that don't need JavaScript.
+    Reuses a single HTTP session, so connections are kept alive between requests.
+    Throttled (429), truncated and timed out responses are retried up to max_retries times, honouring Retry-After.
+    If the server asks to wait longer than max_retry_after seconds, the page is given up rather than retried early.
+    """
+    def __init__(self, timeout=PAGE_LOAD_TIMEOUT, max_retries=3, max_retry_after=120):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.session = requests.Session()
+        self.requests_issued = 0  # Every attempt counts against the FBref request budget, retries included
+
+    def _retry_after(self, response, attempt):
+        """Seconds to wait before retrying a throttled request."""
+        try:
+            delay = float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            delay = SCRAPE_POLICY_DELAY * (attempt + 1)  # No usable header: back off by one policy slot per attempt
+        return max(delay, 0)
+
+    def fetch(self, url, table_name=None):
+        """Returns the page HTML, or None if the page could not be retrieved."""
+        for attempt in range(self.max_retries + 1):
+            retries_left = attempt < self.max_retries
+            self.requests_issued += 1
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.exceptions.ChunkedEncodingError, requests.ConnectionError, requests.Timeout) as e:
+                # Truncated body, dropped connection or server too slow to answer
+                print(f"Incomplete response from {url}: {e}")
+                if retries_left:
+                    time.sleep(SCRAPE_POLICY_DELAY)
+                    continue
+                return None
+            except requests.RequestException as e:
+                print(f"Failed to retrieve {url}: {e}")
+                return None
+            if response.status_code == 429 and retries_left:
+                delay = self._retry_after(response, attempt)
+                if delay > self.max_retry_after:
+                    # A long lockout: retrying early would spend budget and extend the ban
+                    print(f"Rate limited on {url} for {delay:g} seconds (more than {self.max_retry_after} seconds). "
+                          f"Giving up on this page.")
+                    return None
+                print(f"Rate limited on {url}. Retrying in {delay:g} seconds.")
+                time.sleep(delay)
+                continue
+            if response.status_code != 200:
+                print(f"Failed to retrieve {url}. Status code: {response.status_code}")
+                return None
+            return response.text
+        return None
+
+    def close(self):
+        self.session.close()
+
+# True if the static HTML has the table as a real element (FBref ships some tables inside HTML comments,
+# which only become tables once the page has been rendered)
+def has_table(html, table_name):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('table', id=table_name))
+    try:
+        return soup.find('table', id=table_name) is not None
+    finally:
+        soup.decompose()
+
+class BrowserPoolFetcher:
+    """
+    Fetch backend for pages that need JavaScript.
+    Keeps a small pool of long-lived headless browser sessions, started lazily and reused across requests.
+    When a table_name is given and http_fallback is on, the page is first fetched over plain HTTP and the
+    browser is only used if the table is not already in the static HTML. Turn http_fallback off when the
+    pages are known to need JavaScript, so no request is spent on the probe.
+    """
+    def __init__(self, pool_size=2, timeout=PAGE_LOAD_TIMEOUT, http_fallback=True, acquire_timeout=60):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout  # Maximum number of seconds to wait for a free browser
+        self.http_fetcher = HttpFetcher(timeout) if http_fallback else None
+        self.browser_requests = 0
+        self._drivers = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    @property
+    def requests_issued(self):
+        """Requests made against the FBref request budget: browser page loads plus HTTP probes."""
+        http_requests = self.http_fetcher.requests_issued if self.http_fetcher else 0
+        return self.browser_requests + http_requests
+
+    def _acquire_driver(self):
+        """
+        Returns a browser from the pool, or None if none became available within acquire_timeout
+        or a new browser failed to start.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                return self._drivers.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_start = self._started < self.pool_size
+                if can_start:
+                    self._started += 1
+            if can_start:
+                try:
+                    return init_webdriver()
+                except (WebDriverException, OSError, requests.RequestException) as e:
+                    # Edge failed to start or its driver could not be found/downloaded: fail this page, not the run
+                    with self._lock:
+                        self._started -= 1
+                    print(f"Failed to start a browser: {e}")
+                    return None
+                except BaseException:
+                    with self._lock:
+                        self._started -= 1
+                    raise
+            # Pool is full: wait for another caller to release a browser.
+            # Wake up regularly, so a slot freed by a discarded browser can be used to start a new one.
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"No browser became available within {self.acquire_timeout} seconds")
+                return None
+            try:
+                return self._drivers.get(timeout=min(remaining, 1))
+            except queue.Empty:
+                continue
+
+    def _release_driver(self, driver):
+        self._drivers.put(driver)
+
+    def _discard_driver(self, driver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        with self._lock:
+            self._started -= 1
+
+    def fetch(self, url, table_name=None):
+        """Returns the page HTML, or None if the page could not be retrieved."""
+        if self.http_fetcher and table_name:
+            html = self.http_fetcher.fetch(url)
+            if html and has_table(html, table_name):
+                return html  # The table is in the static HTML, no need to render the page
+            # The browser request counts against the same budget as the probe
+            respect_fbref_scrape_policy()
+
+        driver = self._acquire_driver()
+        if driver is None:
+            print(f"Failed to retrieve {url}: no browser available")
+            return None
+        healthy = False
+        try:
+            with self._lock:
+                self.browser_requests += 1
+            html = get_page_content(driver, url, table_name, self.timeout)
+            healthy = True
+            return html
+        except WebDriverException as e:
+            print(f"Failed to retrieve {url} with the browser: {e}")
+            return None
+        finally:
+            # Don't put a broken browser back in the pool
+            if healthy:
+                self._release_driver(driver)
+            else:
+                self._discard_driver(driver)
+
+    def close(self):
+        while True:
+            try:
+                driver = self._drivers.get_nowait()
+            except queue.Empty:
+                break
+            self._discard_driver(driver)
+        if self.http_fetcher:
+            self.http_fetcher.close()
+
+# Fetch backend used by all the scraping functions (plain HTTP unless replaced with set_fetch_backend)
+_fetch_backend = HttpFetcher()
+
+def set_fetch_backend(backend):
+    """Replace the fetch backend used by the scraping functions. Returns the previous backend."""
+    global _fetch_backend
+    previous = _fetch_backend
+    _fetch_backend = backend
+    return previous
+
+def get_fetch_backend():
+    return _fetch_backend
+
+def fetch_page(url, table_name=None):
+    """
+    Fetch a page through the current fetch backend.
+    table_name is the ID of the table the caller needs: JavaScript backends wait for it to be in the page.
+    Returns the page HTML, or None if the page could not be retrieved.
+    """
+    return _fetch_backend.fetch(url, table_name)
+
 # Parse the table using BeautifulSoup
 def extract_table_data(html,table_name):
     soup = BeautifulSoup(html, "html.parser")
@@ -176,19 +420,19 @@ def save_data(df, team):
 
 # Check if the table exists
 def check_table(driver,table_name):
-    try:
-        table_exists = driver.find_element(By.ID, table_name)
-        print(f"Table {table_exists} found using Selenium!")
-    except:
-        print(f"Table {table_exists} not found using Selenium")
+    if wait_for_table(driver, table_name):
+        print(f"Table {table_name} found using Selenium!")
+    else:
+        print(f"Table {table_name} not found using Selenium")
 
 def respect_fbref_scrape_policy():
     """
     Enforces FBref scrape policy of no more than 10 requests per minute
     by pausing for 6 seconds after each request.
+    The pause can be changed with FBREF_SCRAPE_DELAY, e.g. when scraping a local mock server.
     """
-    print("Respecting FBref scrape policy... Sleeping for 6 seconds.")
-    time.sleep(6)  # Sleep for 6 seconds to ensure we don't exceed 10 requests/minute
+    print(f"Respecting FBref scrape policy... Sleeping for {SCRAPE_POLICY_DELAY:g} seconds.")
+    time.sleep(SCRAPE_POLICY_DELAY)  # Sleep for SCRAPE_POLICY_DELAY seconds to ensure we don't exceed the request budget
 
 # Function to normalize team name input
 def normalize_team_name(team_input):
@@ -204,18 +448,13 @@ def normalize_team_name(team_input):
     return normalized_team
 
 def extract_team_urls(url):
-    base_url = "https://fbref.com"  # Root URL to prepend to relative links
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Failed to retrieve FBref page. Status code: {response.status_code}")
-        return {}, {}  # Return two empty dictionaries
-
-    soup = BeautifulSoup(response.text, 'html.parser')
+    base_url = FBREF_BASE_URL  # Root URL to prepend to relative links
+    html = fetch_page(url, "stats_squads_standard_for")
+    if html is None:
+        print("Failed to retrieve FBref league page.")
+        return []
 
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Failed to retrieve FBref league page. Status code: {response.status_code}")
-        return {}, {}  # Return two empty dictionaries
+    soup = BeautifulSoup(html, 'html.parser')
 
     table = soup.find("table", {"id": "stats_squads_standard_for"})
     print(f"Table: {table}")
@@ -262,16 +501,16 @@ def get_normalized_league(league):
     return league  # If no close match is found, return the original league
 
 def extract_match_report_urls(team,url,league):
-    base_url = "https://fbref.com"  # Root URL to prepend to relative links
+    base_url = FBREF_BASE_URL  # Root URL to prepend to relative links
 
     # Normalize the league name using the predefined mapping
     normalized_league = get_normalized_league(league)
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Failed to retrieve FBref page. Status code: {response.status_code}")
-        return {}, {}  # Return two empty dictionaries
+    html = fetch_page(url, "matchlogs_for")
+    if html is None:
+        print("Failed to retrieve FBref page.")
+        return []
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
     table = soup.find("table", {"id": "matchlogs_for"})
     
     if not table:
@@ -364,71 +603,113 @@ def extract_player_data(table):
     return pd.DataFrame(data, columns=headers)
 
 def extract_player_stats(html, team, opponent):
+    """
+    Generator that yields the player stats DataFrames of a match report one at a time,
+    in the same order expected by save_report. The parse tree is released as soon as
+    the last table has been consumed (or the consumer stops early).
+    """
     respect_fbref_scrape_policy()  # Enforce FBref scrape policy
-    soup = BeautifulSoup(html, 'html.parser')
-    tables = soup.find_all('table')
-    # Prepare team and opponent names
-    teams = [team, opponent]
-    dfs = []
-
-    for team_name in teams:
-        team_with_space = team_name.replace("-", " ")
-        pattern = re.compile(
-            rf"(?:FC\s+|SC\s+|Football\s+Club\s+)?{re.escape(team_with_space)}(?:\s+FC|\s+SC|\s+Football\s+Club)?",
-            re.IGNORECASE
-        )
-
-        # Find the tables corresponding to the team or opponent
-        tables_dict = {'Player Stats': [], 'Goalkeeper Stats': [], 'Shots': []}
-        for table in tables:
-            caption = table.find('caption')
-            caption_text = caption.text.strip() if caption else 'No Caption'
-            for key in tables_dict:
-                if pattern.search(caption_text) and key in caption_text:
-                    tables_dict[key].append(table)
-        
-        # Extract data from the found tables
-        for key, table_list in tables_dict.items():
-            for table in table_list:
-                df = extract_player_data(table)
-                dfs.append(df)
-
-    return dfs
+    # Only the tables are needed: don't build the rest of the page
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('table'))
+    del html  # The raw page is no longer needed once parsed
+    try:
+        tables = soup.find_all('table')
+        # Prepare team and opponent names
+        teams = [team, opponent]
+        ordered_tables = []
+
+        for team_name in teams:
+            team_with_space = team_name.replace("-", " ")
+            pattern = re.compile(
+                rf"(?:FC\s+|SC\s+|Football\s+Club\s+)?{re.escape(team_with_space)}(?:\s+FC|\s+SC|\s+Football\s+Club)?",
+                re.IGNORECASE
+            )
+
+            # Find the tables corresponding to the team or opponent
+            tables_dict = {'Player Stats': [], 'Goalkeeper Stats': [], 'Shots': []}
+            for table in tables:
+                caption = table.find('caption')
+                caption_text = caption.text.strip() if caption else 'No Caption'
+                for key in tables_dict:
+                    if pattern.search(caption_text) and key in caption_text:
+                        tables_dict[key].append(table)
+
+            for table_list in tables_dict.values():
+                ordered_tables.extend(table_list)
+        del tables
+
+        # Extract data from the found tables, one DataFrame at a time
+        for i, table in enumerate(ordered_tables):
+            df = extract_player_data(table)
+            # Drop the table from the parse tree unless it is needed again (captions matching both teams)
+            if not any(other is table for other in ordered_tables[i + 1:]):
+                table.decompose()
+            yield df
+    finally:
+        # Drop whatever is left of the parse tree
+        soup.decompose()
+
+# Write (sheet name, DataFrame) pairs to a new Excel file, one row at a time.
+# In constant_memory mode xlsxwriter flushes each row to disk, so only the current table is held in memory.
+# (pandas' to_excel writes column by column, which constant_memory doesn't support.)
+def write_excel_sheets(tables, output_file):
+    workbook = None
+    used_names = set()
+    for sheet_name, df in tables:
+        sheet_name = sheet_name[:31]  # Excel sheet names are limited to 31 characters
+        # Create the workbook lazily, so no empty file is created when there are no tables
+        if workbook is None:
+            workbook = xlsxwriter.Workbook(output_file, {'constant_memory': True})
+            header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+        # Excel sheet names must be unique (case insensitive)
+        name, n = sheet_name, 2
+        while name.lower() in used_names:
+            suffix = f" ({n})"
+            name = sheet_name[:31 - len(suffix)] + suffix
+            n += 1
+        used_names.add(name.lower())
+
+        worksheet = workbook.add_worksheet(name)
+        worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+        for row_number, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_number, 0, [None if pd.isna(value) else value for value in row])
+    if workbook is None:
+        return False
+    workbook.close()
+    return True
 
 # Save the scraped match report tables to a new Excel file with multiple sheets
 def save_report(dfs, team, opponent,report_file):
     
-    # Save each dataframe in a separate sheet
-    with pd.ExcelWriter(report_file, engine='xlsxwriter') as writer:
-        # Define sheet names for each DataFrame
-        sheet_names = [
-            f"{team} Summary",
-            f"{team} Pass",
-            f"{team} PassType",
-            f"{team} Def Act",
-            f"{team} Poss",
-            f"{team} Other",
-            f"{team} GK",
-            f"{opponent} Summary",
-            f"{opponent} Pass",
-            f"{opponent} PassType",
-            f"{opponent} Def Act",
-            f"{opponent} Poss",
-            f"{opponent} Other",
-            f"{opponent} GK",
-            "Both Squads",
-            f"{team} Shots",
-            f"{opponent} Shots",
-        ]
-        
-        # Iterate over the list of dataframes and save each one to a different sheet
-        for i, df in enumerate(dfs):
-            # Ensure sheet names match the order and number of DataFrames
-            if i < len(sheet_names):  # Avoid index error if the list of dfs is shorter than sheet names
-                sheet_name = sheet_names[i]
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-    
-    print(f"Saved match report to {report_file}")
+    # Define sheet names for each DataFrame
+    sheet_names = [
+        f"{team} Summary",
+        f"{team} Pass",
+        f"{team} PassType",
+        f"{team} Def Act",
+        f"{team} Poss",
+        f"{team} Other",
+        f"{team} GK",
+        f"{opponent} Summary",
+        f"{opponent} Pass",
+        f"{opponent} PassType",
+        f"{opponent} Def Act",
+        f"{opponent} Poss",
+        f"{opponent} Other",
+        f"{opponent} GK",
+        "Both Squads",
+        f"{team} Shots",
+        f"{opponent} Shots",
+    ]
+    
+    # Consume the dataframes one at a time and save each one to a different sheet.
+    # zip stops at the shorter of the two, so extra tables are never extracted.
+    saved = write_excel_sheets(zip(sheet_names, dfs), report_file)
+    
+    if saved:
+        print(f"Saved match report to {report_file}")
+    else:
+        print(f"No match report tables found for {team} - {opponent}")
     return 
 
 def scrape_and_save_reports(report_url,report_file,match_number,team,opponent):
@@ -444,10 +725,14 @@ def scrape_and_save_reports(report_url,report_file,match_number,team,opponent):
         print(f"Processing Match {match_number}: {team} vs {opponent}")
         
 
-        response = requests.get(report_url)
+        html = fetch_page(report_url)
+        if html is None:
+            print(f"Failed to retrieve match report for Match {match_number}")
+            return
 
-        # Extract list of DataFrames (team and opponent)
-        dfs = extract_player_stats(response.text, team, opponent)
+        # Lazily extract the DataFrames (team and opponent), one table at a time
+        dfs = extract_player_stats(html, team, opponent)
+        del html  # The generator now holds the only reference to the page
         
         
         team_with_space = team.replace("-", " ")
@@ -507,13 +792,13 @@ def save_cache(_dict, cache_file):
         json.dump(_dict, file)
 
 def scrape_league_links_from_fbref():
-    url = "https://fbref.com/en/comps/"  # FBref competitions page
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Failed to retrieve FBref page. Status code: {response.status_code}")
+    url = FBREF_BASE_URL + "/en/comps/"  # FBref competitions page
+    html = fetch_page(url, "comps_1_fa_club_league_senior")
+    if html is None:
+        print("Failed to retrieve FBref page.")
         return {}, {}  # Return two empty dictionaries
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
     
     men_league_dict = {}
     women_league_dict = {}
@@ -532,7 +817,7 @@ def scrape_league_links_from_fbref():
             league_link_tag = headers[0].find('a')  # Find the link for the league in th
             if league_link_tag:
                 league_name = league_link_tag.text.strip()
-                league_url = 'https://fbref.com' + league_link_tag['href']
+                league_url = FBREF_BASE_URL + league_link_tag['href']
                 if league_gender == 'M':
                     men_league_dict[league_name] = {'url': league_url, 'gender': league_gender}
                 elif league_gender == 'F':
@@ -552,7 +837,7 @@ def scrape_league_links_from_fbref():
             league_link_tag = headers[0].find('a')  # Find the link for the league in th
             if league_link_tag:
                 league_name = league_link_tag.text.strip()
-                league_url = 'https://fbref.com' + league_link_tag['href']
+                league_url = FBREF_BASE_URL + league_link_tag['href']
                 if league_gender == 'M':
                     men_league_dict[league_name] = {'url': league_url, 'gender': league_gender}
                 elif league_gender == 'F':
@@ -598,12 +883,12 @@ def get_closest_league(input_league, cache_file, gender):
 # Function to scrape league links from FBref's main competitions page
 def scrape_season_links_from_fbref(league_url):
     print(f"League URL: {league_url}") #debugging
-    response = requests.get(league_url)
-    if response.status_code != 200:
-        print(f"Failed to retrieve FBref page. Status code: {response.status_code}")
+    html = fetch_page(league_url, "seasons")
+    if html is None:
+        print("Failed to retrieve FBref page.")
         return {}
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
     
     seasons_dict = {}
     
@@ -618,7 +903,7 @@ def scrape_season_links_from_fbref(league_url):
         season_link_tag = row.find('a')  # Find the link for the season
         if season_link_tag:
             season_name = season_link_tag.text.strip()
-            season_url = 'https://fbref.com' + season_link_tag['href']
+            season_url = FBREF_BASE_URL + season_link_tag['href']
             seasons_dict[season_name] = season_url  
              
     return seasons_dict
@@ -644,12 +929,12 @@ def get_season_url(season,cache_file,league_url):
 
 def get_scores_and_fixtures_url(competition_url):
     # Send a request to the competition page
-    response = requests.get(competition_url)
-    if response.status_code != 200:
-        print(f"Failed to retrieve the page. Status code: {response.status_code}")
+    html = fetch_page(competition_url)
+    if html is None:
+        print("Failed to retrieve the page.")
         return None
     
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
     
     # Find the div with id "inner_nav" and look for the "Scores & Fixtures" link
     inner_nav = soup.find('div', {'id': 'inner_nav'})
@@ -663,105 +948,119 @@ def get_scores_and_fixtures_url(competition_url):
         return None
     
     # Extract the relative URL and create the full URL
-    scores_fixtures_url = 'https://fbref.com' + scores_link_tag['href']
+    scores_fixtures_url = FBREF_BASE_URL + scores_link_tag['href']
     
     return scores_fixtures_url
 
-def scrape_page_tables(url, output_file, table_card_position):
+def extract_page_tables(html, table_card_position):
     """
-    Scrape tables from the given URL and save to an Excel file. 
+    Generator that yields (caption, DataFrame) pairs for the tables of a page, one at a time.
     The table_card_position determines if the scraped tables are in the "left" or "right" container.
+    The parse tree is released as soon as the last table has been consumed.
     """
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # Find all divs that have class "table_container"
-    tables_div = soup.find_all('div', class_='table_container')
+    # Only the table containers are needed: don't build the rest of the page
+    # (while parsing, the class attribute is still the whole string, e.g. "table_container current")
+    only_containers = SoupStrainer('div', class_=lambda classes: classes and 'table_container' in classes.split())
+    soup = BeautifulSoup(html, 'html.parser', parse_only=only_containers)
+    del html  # The raw page is no longer needed once parsed
+    try:
+        # Find all divs that have class "table_container"
+        tables_div = soup.find_all('div', class_='table_container')
 
-    if not tables_div:
-        print(f"No tables found.")
-        return
-    
-    # Initialize the Excel writer
-    writer = pd.ExcelWriter(output_file, engine='openpyxl')
+        if not tables_div:
+            print(f"No tables found.")
+            return
 
-    for div in tables_div:
-        # Check if the div belongs to the "left" or "right" card based on the presence of "current"
-        is_left_card = 'current' in div.get('class', [])
+        for div in tables_div:
+            # Check if the div belongs to the "left" or "right" card based on the presence of "current"
+            is_left_card = 'current' in div.get('class', [])
 
-        # Continue only if the current div matches the specified table_card_position
-        if (table_card_position == "left" and not is_left_card) or (table_card_position == "right" and is_left_card):
-            continue
+            # Continue only if the current div matches the specified table_card_position
+            if (table_card_position == "left" and not is_left_card) or (table_card_position == "right" and is_left_card):
+                continue
 
-        # Ensure the div contains a table
-        table = div.find('table')
-        if not table:
-            continue
+            # Ensure the div contains a table
+            table = div.find('table')
+            if not table:
+                continue
 
-        # Extract the caption
-        caption_tag = table.find('caption')
-        if not caption_tag:
-            continue
+            # Extract the caption
+            caption_tag = table.find('caption')
+            if not caption_tag:
+                continue
 
-        caption = caption_tag.text.strip()
+            caption = caption_tag.text.strip()
 
-        # Extract table headers and rows
-        headers = []
-        rows = []
+            # Extract table headers and rows
+            headers = []
+            rows = []
         
-        # Extract table headers and rows
-        header_rows = table.find('thead').find_all('tr')
-        if len(header_rows) > 1:
-            # Use the second row for actual column names if there are two rows
-            headers = [header.text.strip() for header in header_rows[1].find_all('th')]
-        else:
-            # Fallback to the first row if only one row of headers exists
-            headers = [header.text.strip() for header in header_rows[0].find_all('th')]
-        #if header_rows:
-        #    if len(header_rows) > 1:
-        #        # Use the second row for actual column names
-        #        actual_headers_row = header_rows[1]
-        #        headers = [header.text.strip() for header in actual_headers_row.find_all('th')]
-        #    else:
-        #        # Fallback to the first row if only one row of headers exists
-        #        headers = [header.text.strip() for header in header_rows[0].find_all('th')]
-
-        # Extract rows
-        body = table.find('tbody')
-        if body:
-            for row in body.find_all('tr'):
-                cells = [cell.text.strip() for cell in row.find_all(['td', 'th'])]
-                rows.append(cells)
-                # Replace empty cells with 0
-                #cells = [cell if cell else '0' for cell in cells]
-                #if cells:
-                #    rows.append(cells)
-
-        # Handle header/data column mismatch
-        num_columns = len(rows[0]) if rows else 0
-        if num_columns != len(headers):
-            print(f"Warning: Mismatch between headers ({len(headers)}) and data columns ({num_columns}). Adjusting headers.")
-            headers = headers[:num_columns]
+            # Extract table headers and rows
+            header_rows = table.find('thead').find_all('tr')
+            if len(header_rows) > 1:
+                # Use the second row for actual column names if there are two rows
+                headers = [header.text.strip() for header in header_rows[1].find_all('th')]
+            else:
+                # Fallback to the first row if only one row of headers exists
+                headers = [header.text.strip() for header in header_rows[0].find_all('th')]
+            #if header_rows:
+            #    if len(header_rows) > 1:
+            #        # Use the second row for actual column names
+            #        actual_headers_row = header_rows[1]
+            #        headers = [header.text.strip() for header in actual_headers_row.find_all('th')]
+            #    else:
+            #        # Fallback to the first row if only one row of headers exists
+            #        headers = [header.text.strip() for header in header_rows[0].find_all('th')]
+
+            # Extract rows
+            body = table.find('tbody')
+            if body:
+                for row in body.find_all('tr'):
+                    cells = [cell.text.strip() for cell in row.find_all(['td', 'th'])]
+                    rows.append(cells)
+                    # Replace empty cells with 0
+                    #cells = [cell if cell else '0' for cell in cells]
+                    #if cells:
+                    #    rows.append(cells)
+
+            # Handle header/data column mismatch
+            num_columns = len(rows[0]) if rows else 0
+            if num_columns != len(headers):
+                print(f"Warning: Mismatch between headers ({len(headers)}) and data columns ({num_columns}). Adjusting headers.")
+                headers = headers[:num_columns]
         
-        # Create DataFrame
-        try:
-            df = pd.DataFrame(rows, columns=headers)
-        except ValueError as e:
-            print(f"Error creating DataFrame: {e}")
-            continue
-
-        # Drop rows where all values are NaN
-        df.dropna(how='all', inplace=True)
+            # Create DataFrame
+            try:
+                df = pd.DataFrame(rows, columns=headers)
+            except ValueError as e:
+                print(f"Error creating DataFrame: {e}")
+                continue
+
+            # Drop rows where all values are NaN
+            df.dropna(how='all', inplace=True)
         
-        # Fill any remaining NaN values with 0 (in case of unbalanced rows or missing data)
-        df.fillna(0, inplace=True)
+            # Fill any remaining NaN values with 0 (in case of unbalanced rows or missing data)
+            df.fillna(0, inplace=True)
         
-        # Write each table to a different sheet named after the caption
-        sheet_name = caption[:31]  # Excel sheet names are limited to 31 characters
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-    writer.close()
-
-
+            yield caption, df
+            # The table has been consumed: drop it from the parse tree
+            div.decompose()
+    finally:
+        # Drop whatever is left of the parse tree
+        soup.decompose()
 
+def scrape_page_tables(url, output_file, table_card_position):
+    """
+    Scrape tables from the given URL and save to an Excel file. 
+    The table_card_position determines if the scraped tables are in the "left" or "right" container.
+    Tables are written row by row as they are extracted, so only one table is held in memory at a time.
+    """
+    html = fetch_page(url)
+    if html is None:
+        print(f"Failed to retrieve {url}.")
+        return
+    tables = extract_page_tables(html, table_card_position)
+    del html  # The generator now holds the only reference to the page
 
+    # Write each table to a different sheet named after the caption
+    write_excel_sheets(tables, output_file)